@@ -1,15 +1,18 @@
 # -*- coding: utf-8 -*-
 import types
+import array
 import datetime
 
-from cast import Cast
+from cast import Cast, IterativeCast, ConcurrentCast
+from tracing import Tracer, ProfileTracer
 from utils import AllSubSetsOf, ClassSet, AttrDict
 from node import (Node, IterableNode,
-MappingNode, IdentityNode, NodeInfo)
+MappingNode, IdentityNode, StreamNode, NodeInfo)
+from buffers import BufferNode
 
-__all__ = ['serialize', 'deserialize', 'Cast', 'AllSubSetsOf',
-'ClassSet', 'AttrDict', 'Node', 'IterableNode', 'MappingNode',
-'IdentityNode', 'NodeInfo']
+__all__ = ['serialize', 'deserialize', 'Cast', 'IterativeCast', 'ConcurrentCast',
+'AllSubSetsOf', 'ClassSet', 'AttrDict', 'Node', 'IterableNode', 'MappingNode',
+'IdentityNode', 'StreamNode', 'BufferNode', 'NodeInfo', 'Tracer', 'ProfileTracer']
 
 serialize = Cast({
     AllSubSetsOf(dict): MappingNode,
@@ -19,6 +22,9 @@ serialize = Cast({
     AllSubSetsOf(bool): IdentityNode,
     AllSubSetsOf(basestring): IdentityNode,
     AllSubSetsOf(types.NoneType): IdentityNode,
+    AllSubSetsOf(bytearray): BufferNode,
+    AllSubSetsOf(memoryview): BufferNode,
+    AllSubSetsOf(array.array): BufferNode,
 }, {
     AllSubSetsOf(dict): MappingNode,
     AllSubSetsOf(list): IterableNode,
@@ -34,4 +40,7 @@ deserialize = Cast({
     AllSubSetsOf(bool): IdentityNode,
     AllSubSetsOf(basestring): IdentityNode,
     AllSubSetsOf(types.NoneType): IdentityNode,
+    AllSubSetsOf(bytearray): BufferNode,
+    AllSubSetsOf(memoryview): BufferNode,
+    AllSubSetsOf(array.array): BufferNode,
 })
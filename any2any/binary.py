@@ -0,0 +1,444 @@
+# -*- coding: utf-8 -*-
+"""
+A compact binary format, written and read with the same protocol as
+:mod:`any2any.jsonstream`, so any dumper or loader can be used. For example ::
+
+    >>> with open('library.bin', 'wb') as fd:
+    ...     dump_binary(library, fd, cast=serialize_objects)
+    >>> with open('library.bin', 'rb') as fd:
+    ...     library = load_binary(fd, loader=LibraryNode)
+
+Each value starts with a type byte. Varints are unsigned integers stored
+7 bits per byte, the least significant first, with the high bit set
+on all the bytes but the last :
+
+    - integers from 0 to 127 are that byte only, ``0x80 + value``
+    - other integers are followed by their zigzag varint, so small
+      negative integers are small as well
+    - floats are followed by 4 bytes if they are exact in single precision,
+      or else 8 bytes, little-endian
+    - `str` and `unicode` are followed by the varint of their length in bytes,
+      then the bytes, UTF-8 encoded for `unicode`. If shorter than 32 bytes,
+      their length is in the type byte, ``0x40 + length`` for `str`
+      and ``0x60 + length`` for `unicode`
+    - maps and arrays are followed by the varint of the number of their items,
+      then the items : for maps a key and a value, for arrays a value
+
+Unlike JSON, the keys of maps can be any scalar, and are read back with their type.
+"""
+import struct
+import types
+
+from node import NodeInfo
+from formats import WriterNode, Writer, Cursor
+
+
+BUFFER_SIZE = 64 * 1024
+"""Initial size of the `bytearray` written to. It is doubled when full."""
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _DOUBLE, _STR, _UNICODE, _MAP, _ARRAY = range(10)
+_FIXSTR = 0x40
+_FIXUNICODE = 0x60
+_FIXINT = 0x80
+_FIXSTR_SIZE = 0x20
+
+_FLOAT_STRUCT = struct.Struct('<f')
+_DOUBLE_STRUCT = struct.Struct('<d')
+
+
+class BinaryWriterNode(WriterNode):
+    """
+    Loader node class, whose :meth:`__load__` returns a :class:`BinaryWriter`
+    instead of an object. Works like :class:`any2any.jsonstream.JSONWriterNode` :
+    each value is casted only when it is written, dumpers whose ``ordered_keys``
+    is `True` are written as arrays, and the others as maps.
+    Values loaded with other loaders must be scalars, dicts, lists or tuples.
+    """
+
+    static_schema = True
+
+
+BinaryWriterNode.value_type = NodeInfo(int, float, bool, basestring, types.NoneType,
+    BinaryWriterNode)
+
+
+class BinaryWriter(Writer):
+    """
+    Object returned by :meth:`BinaryWriterNode.__load__`, writing the items
+    it was loaded from in binary. It can be written only once.
+    """
+
+    __slots__ = ()
+
+    def write(self, fp):
+        """
+        Writes the binary to `fp`, which must have a ``write`` method.
+        """
+        fp.write(self.getvalue())
+
+    def getvalue(self):
+        """
+        Returns the binary as a string.
+        """
+        out = _Output(BUFFER_SIZE)
+        self._write(out)
+        return out.getvalue()
+
+    # The header of a map or an array is written before its first item,
+    # and its count once it is done. The state of a map or an array
+    # is the position of its header.
+
+    def _write_item(self, out, is_array, count, header, key):
+        if header is None:
+            header = out.write_header(_ARRAY if is_array else _MAP)
+        if not is_array:
+            out.write_key(key)
+        return header
+
+    def _write_end(self, out, is_array, count, header):
+        if header is None:
+            header = out.write_header(_ARRAY if is_array else _MAP)
+        out.write_count(header, count)
+
+    def _write_value(self, out, value):
+        out.write_value(value)
+
+
+BinaryWriterNode.writer_class = BinaryWriter
+
+
+def dump_binary(obj, fp, cast=None, dumper=NodeInfo()):
+    """
+    Casts `obj` with `cast` and :class:`BinaryWriterNode`, and writes
+    the binary to `fp`. By default, `cast` is :data:`any2any.serialize`.
+    """
+    if cast is None:
+        from any2any import serialize as cast
+    writer = cast(obj, dumper=dumper, loader=BinaryWriterNode)
+    writer.write(fp)
+
+
+class _Output(object):
+    """
+    The `bytearray` written to, allocated in advance. :attr:`pos`
+    is the number of bytes written.
+    """
+
+    __slots__ = ('buf', 'pos')
+
+    def __init__(self, size):
+        self.buf = bytearray(size)
+        self.pos = 0
+
+    def getvalue(self):
+        return memoryview(self.buf)[:self.pos].tobytes()
+
+    def reserve(self, size):
+        """
+        Makes room for `size` bytes more.
+        """
+        missing = self.pos + size - len(self.buf)
+        if missing > 0:
+            self.buf.extend(bytearray(max(missing, len(self.buf))))
+
+    def write_value(self, value):
+        """
+        Writes `value`, which isn't a :class:`BinaryWriter`.
+        """
+        value_type = type(value)
+        if value_type is str:
+            self.write_bytes(_STR, _FIXSTR, value)
+        elif value_type is unicode:
+            self.write_bytes(_UNICODE, _FIXUNICODE, value.encode('utf-8'))
+        elif value_type is int or value_type is long:
+            if 0 <= value < 0x80:
+                self.reserve(1)
+                self.buf[self.pos] = _FIXINT + value
+                self.pos += 1
+            else:
+                self.write_int(value)
+        elif value_type is float:
+            self.write_float(value)
+        elif value is None or value is True or value is False:
+            self.reserve(1)
+            self.buf[self.pos] = _NONE if value is None else (_TRUE if value else _FALSE)
+            self.pos += 1
+        elif isinstance(value, dict):
+            header = self.write_header(_MAP)
+            for key, item in value.iteritems():
+                self.write_key(key)
+                self.write_value(item)
+            self.write_count(header, len(value))
+        elif isinstance(value, (list, tuple)):
+            header = self.write_header(_ARRAY)
+            for item in value:
+                self.write_value(item)
+            self.write_count(header, len(value))
+        elif isinstance(value, (int, long)):
+            self.write_value(int(value))
+        elif isinstance(value, float):
+            self.write_value(float(value))
+        elif isinstance(value, str):
+            self.write_value(str(value))
+        elif isinstance(value, unicode):
+            self.write_value(unicode(value))
+        else:
+            raise TypeError('%r is not serializable in binary' % (value,))
+
+    def write_key(self, key):
+        """
+        Writes the key of a map item, which must be a scalar.
+        """
+        if isinstance(key, (BinaryWriter, dict, list, tuple)):
+            raise TypeError('key %r is not a scalar' % (key,))
+        self.write_value(key)
+
+    def write_int(self, value):
+        varint = _varint(value << 1 if value >= 0 else (-value << 1) - 1)
+        self.reserve(1 + len(varint))
+        pos = self.pos
+        self.buf[pos] = _INT
+        self.buf[pos + 1:pos + 1 + len(varint)] = varint
+        self.pos = pos + 1 + len(varint)
+
+    def write_float(self, value):
+        self.reserve(1 + _DOUBLE_STRUCT.size)
+        pos = self.pos
+        try:
+            _FLOAT_STRUCT.pack_into(self.buf, pos + 1, value)
+        except OverflowError:
+            single = False
+        else:
+            single = _FLOAT_STRUCT.unpack_from(self.buf, pos + 1)[0] == value
+        if single:
+            self.buf[pos] = _FLOAT
+            self.pos = pos + 1 + _FLOAT_STRUCT.size
+        else:
+            self.buf[pos] = _DOUBLE
+            _DOUBLE_STRUCT.pack_into(self.buf, pos + 1, value)
+            self.pos = pos + 1 + _DOUBLE_STRUCT.size
+
+    def write_bytes(self, tag, fixtag, data):
+        length = len(data)
+        pos = self.pos
+        if length < _FIXSTR_SIZE:
+            self.reserve(1 + length)
+            self.buf[pos] = fixtag + length
+            pos += 1
+        else:
+            varint = _varint(length)
+            self.reserve(1 + len(varint) + length)
+            self.buf[pos] = tag
+            self.buf[pos + 1:pos + 1 + len(varint)] = varint
+            pos += 1 + len(varint)
+        self.buf[pos:pos + length] = data
+        self.pos = pos + length
+
+    def write_header(self, tag):
+        """
+        Writes the header of a map or an array, and returns its position,
+        to write the count with :meth:`write_count`. One byte is kept for
+        the count, which is enough for up to 127 items.
+        """
+        self.reserve(2)
+        header = self.pos
+        self.buf[header] = tag
+        self.pos += 2
+        return header
+
+    def write_count(self, header, count):
+        buf = self.buf
+        if count < 0x80:
+            buf[header + 1] = count
+            return
+        # The items are moved to make room for the longer count.
+        varint = _varint(count)
+        extra = len(varint) - 1
+        self.reserve(extra)
+        start = header + 2
+        buf[start + extra:self.pos + extra] = buf[start:self.pos]
+        buf[header + 1:start + extra] = varint
+        self.pos += extra
+
+
+def _varint(value):
+    """
+    Returns the varint of `value`, as a `bytearray`.
+    """
+    varint = bytearray()
+    while value >= 0x80:
+        varint.append((value & 0x7f) | 0x80)
+        value >>= 7
+    varint.append(value)
+    return varint
+
+
+def load_binary(fp, cast=None, loader=NodeInfo()):
+    """
+    Reads binary from `fp`, which must have a ``read`` method,
+    and casts it with `cast` and `loader`. By default, `cast` is
+    :data:`any2any.deserialize`.
+
+    Maps and arrays are read with :class:`BinaryMapCursor` and
+    :class:`BinaryArrayCursor`, so they are decoded straight to the objects
+    loaded. Raises :class:`ValueError` if the binary is not valid, or if a map
+    or an array is loaded by a lazy loader.
+    """
+    if cast is None:
+        from any2any import deserialize as cast
+    reader = _Reader(fp.read())
+    root = reader.read_value()
+    casted = cast(root, loader=loader)
+    if isinstance(root, BinaryCursor):
+        root.skip()
+    if reader.pos < len(reader.data):
+        raise reader.error('Extra data')
+    return casted
+
+
+class BinaryCursor(Cursor):
+    """
+    Base for the :class:`any2any.formats.Cursor` read by :func:`load_binary`
+    in place of maps and arrays. Its :meth:`__load__` loads it to a `dict` or a `list`.
+    """
+
+    __slots__ = ('_reader', '_count')
+
+    def __init__(self, reader, count):
+        super(BinaryCursor, self).__init__()
+        self._reader = reader
+        self._count = count
+
+
+class BinaryMapCursor(BinaryCursor):
+    """
+    Cursor on a map.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def __load__(cls, items_iter):
+        return dict(items_iter)
+
+    def _iter_items(self):
+        reader = self._reader
+        for i in xrange(self._count):
+            key = reader.read_value()
+            if isinstance(key, BinaryCursor):
+                raise reader.error('Expecting a scalar key')
+            value = reader.read_value()
+            yield key, value
+            if isinstance(value, BinaryCursor):
+                value.skip()
+
+
+class BinaryArrayCursor(BinaryCursor):
+    """
+    Cursor on an array. Its keys are the indexes, in order.
+    """
+
+    __slots__ = ()
+
+    ordered_keys = True
+
+    @classmethod
+    def __load__(cls, items_iter):
+        return [value for key, value in items_iter]
+
+    def _iter_items(self):
+        reader = self._reader
+        for index in xrange(self._count):
+            value = reader.read_value()
+            yield index, value
+            if isinstance(value, BinaryCursor):
+                value.skip()
+
+
+_CONSTANTS = {_NONE: None, _FALSE: False, _TRUE: True}
+
+
+class _Reader(object):
+    """
+    Parses the binary in :attr:`data`, from :attr:`pos`.
+    """
+
+    __slots__ = ('data', 'pos')
+
+    def __init__(self, data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        self.data = str(data)
+        self.pos = 0
+
+    def error(self, message):
+        return ValueError('%s: byte %s' % (message, self.pos))
+
+    def read_value(self):
+        """
+        Parses the next value. Maps and arrays are returned as cursors.
+        """
+        data = self.data
+        pos = self.pos
+        if pos >= len(data):
+            raise self.error('Expecting value')
+        tag = ord(data[pos])
+        self.pos = pos + 1
+        if tag >= _FIXINT:
+            return tag - _FIXINT
+        elif tag >= _FIXUNICODE:
+            return self.read_bytes(tag - _FIXUNICODE).decode('utf-8')
+        elif tag >= _FIXSTR:
+            return self.read_bytes(tag - _FIXSTR)
+        elif tag == _STR:
+            return self.read_bytes(self.read_varint())
+        elif tag == _UNICODE:
+            return self.read_bytes(self.read_varint()).decode('utf-8')
+        elif tag == _INT:
+            value = self.read_varint()
+            # `int` returns an `int` rather than a `long` when possible.
+            return int(value >> 1 if not value & 1 else -((value + 1) >> 1))
+        elif tag == _FLOAT:
+            return self.unpack(_FLOAT_STRUCT)
+        elif tag == _DOUBLE:
+            return self.unpack(_DOUBLE_STRUCT)
+        elif tag == _MAP:
+            return BinaryMapCursor(self, self.read_varint())
+        elif tag == _ARRAY:
+            return BinaryArrayCursor(self, self.read_varint())
+        elif tag in _CONSTANTS:
+            return _CONSTANTS[tag]
+        self.pos = pos
+        raise self.error('Unknown type %#x' % tag)
+
+    def read_varint(self):
+        data = self.data
+        pos = self.pos
+        value = 0
+        shift = 0
+        while True:
+            if pos >= len(data):
+                raise self.error('Truncated integer')
+            byte = ord(data[pos])
+            pos += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                self.pos = pos
+                return value
+            shift += 7
+
+    def read_bytes(self, length):
+        end = self.pos + length
+        if end > len(self.data):
+            raise self.error('Truncated string')
+        value = self.data[self.pos:end]
+        self.pos = end
+        return value
+
+    def unpack(self, packer):
+        end = self.pos + packer.size
+        if end > len(self.data):
+            raise self.error('Truncated value')
+        value, = packer.unpack_from(self.data, self.pos)
+        self.pos = end
+        return value
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Node class for binary buffers and arrays of numbers, which are passed
+from the dumper to the loader as a whole, instead of number by number.
+"""
+import array
+
+from node import Node, NodeInfo, _sorted_values
+from utils import AttrDict
+
+
+class BufferNode(Node):
+    """
+    Node class for `str`, `bytearray`, `memoryview`, `array.array`, and lists of numbers.
+    Its :meth:`__dump__` passes the object as is with ``AttrDict.KeyFinal``,
+    so that the loader can convert it at once. Its :meth:`__load__` converts
+    the object received to :attr:`klass`, without copying it if possible :
+
+        - objects of :attr:`klass` (with :attr:`typecode` for `array.array`)
+          are returned as is
+        - `memoryview` of `str` and `bytearray` share their memory
+        - conversions between bytes and `array.array` copy the machine values,
+          and conversions between lists and `array.array` the numbers
+
+    Lists of numbers are loaded with ``klass = list``. Items dumped one by one,
+    e.g. by :class:`IterableNode`, are loaded as a list of numbers.
+    """
+
+    klass = memoryview
+
+    static_schema = True
+
+    typecode = None
+    """
+    Type code of the `array.array` loaded, and of the numbers converted to bytes.
+    If `None`, arrays keep their type code, and other objects are loaded as bytes, ``'B'``.
+    """
+
+    @classmethod
+    def __dump__(cls, obj):
+        yield AttrDict.KeyFinal, obj
+
+    @classmethod
+    def __load__(cls, items_iter):
+        ordered_keys = getattr(items_iter, 'ordered_keys', False)
+        items = list(items_iter)
+        if len(items) == 1 and items[0][0] is AttrDict.KeyFinal:
+            value = items[0][1]
+        elif ordered_keys:
+            value = [v for k, v in items]
+        else:
+            value = _sorted_values(iter(items), len(items))
+        typecode = cls.typecode
+        if typecode is None:
+            typecode = getattr(value, 'typecode', 'B')
+        return _convert(value, cls.klass, typecode)
+
+    @classmethod
+    def __dschema__(cls, obj):
+        return {AttrDict.KeyFinal: cls.klass}
+
+    @classmethod
+    def __lschema__(cls):
+        return {AttrDict.KeyAny: NodeInfo()}
+
+
+def _convert(value, klass, typecode):
+    """
+    Converts `value` to `klass`, copying it only if needed.
+    """
+    if type(value) is klass and (not klass is array.array or value.typecode == typecode):
+        return value
+    if klass is memoryview:
+        if isinstance(value, (str, bytearray)):
+            return memoryview(value)
+        return memoryview(_to_bytes(value, typecode))
+    if klass is array.array:
+        casted = array.array(typecode)
+        if isinstance(value, array.array):
+            casted.extend(value.tolist())
+        elif isinstance(value, (list, tuple)):
+            casted.extend(value)
+        else:
+            casted.fromstring(_to_bytes(value, typecode))
+        return casted
+    if klass is bytearray and isinstance(value, (list, tuple)):
+        return bytearray(value)
+    if issubclass(klass, (list, tuple)):
+        if isinstance(value, (array.array, memoryview)):
+            return klass(value.tolist())
+        return klass(bytearray(_to_bytes(value, typecode)))
+    return klass(_to_bytes(value, typecode))
+
+
+def _to_bytes(value, typecode):
+    """
+    Returns the bytes of `value`, as a `str`.
+    """
+    if isinstance(value, memoryview):
+        return value.tobytes()
+    if isinstance(value, array.array):
+        return value.tostring()
+    if isinstance(value, (list, tuple)):
+        return array.array(typecode, value).tostring()
+    return str(value)
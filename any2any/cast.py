@@ -1,61 +1,302 @@
 # -*- coding: utf-8 -*-
-import copy
+import sys
 import types
+import threading
+import itertools
+import collections
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import cPickle
+from timeit import default_timer
 
-from node import NodeInfo, Node
-from utils import ClassSetDict, AttrDict
-from exceptions import NotIncludedError, NoNodeClassError
+from node import NodeInfo, Node, IdentityNode, _has_ordered_keys
+from tracing import LogTracer, ProfileTracer
+from utils import ClassSetDict, AttrDict, FrozenAttrDict, BoundedCache
+from exceptions import NotIncludedError, NoNodeClassError, CycleError
+
+
+SCALAR_TYPES = frozenset([int, long, float, bool, str, unicode, types.NoneType])
+"""
+Built-in types whose values are copied as is, without calling the nodes,
+when both dumper and loader resolve to :class:`IdentityNode`.
+"""
+
+DISPATCH_TYPES = SCALAR_TYPES | frozenset([dict, list, tuple])
+"""
+Built-in types for which the node classes are looked-up by exact type
+in a dispatch table, before searching :attr:`Cast.node_class_map`.
+"""
+
+
+_no_node_info = NodeInfo()
+"""NodeInfo without any information, shared by the default schemas."""
 
 
 class Cast(object):
+    """
+    Casts objects, picking node classes from `node_class_map`, or from `fallback_map`
+    when the loader isn't known. A cast holds no state specific to a call,
+    so the same cast can be used from several threads at once.
+    Casts can be pickled, if their node classes and tracer can be pickled.
+
+    By default, an object referenced several times in the input is casted
+    each time, so the output is a tree. If ``memoize`` is `True`, each object
+    is casted once per call, and the result is reused for the next references
+    with the same dumper and loader, like :func:`copy.deepcopy` does.
+    An object containing itself then raises :class:`CycleError`, instead of
+    recursing forever. Values casted lazily, after the call has returned,
+    are not memoized.
+    """
 
     def __init__(self, node_class_map, fallback_map={}):
         #TODO: fallback mightn't be needed, if checking type of dumped inpt
         self.node_class_map = ClassSetDict(node_class_map)
         self.fallback_map = ClassSetDict(fallback_map)
-        self._depth_counter = 0
-        self.debug = False
+        self.tracer = None
+        self.memoize = False
+        self._local = threading.local()
+        self._schema_cache = BoundedCache()
+        self._dispatch = (None, None, {})
+
+    @property
+    def debug(self):
+        """
+        If `True`, the casting operations are printed. Setting this attaches
+        a :class:`LogTracer` to the cast, and unsetting it detaches it.
+        Other tracers are left as is when unsetting.
+        """
+        return isinstance(self.tracer, LogTracer)
+
+    @debug.setter
+    def debug(self, value):
+        if value:
+            if not self.debug:
+                self.tracer = LogTracer()
+        elif self.debug:
+            self.tracer = None
+
+    @property
+    def profile(self):
+        """
+        If `True`, statistics are collected about the casting operations, and
+        can be read with :meth:`stats`. Setting this attaches a :class:`ProfileTracer`
+        to the cast, and unsetting it detaches it. Other tracers are left as is
+        when unsetting. Profiling is disabled by default.
+        """
+        return isinstance(self.tracer, ProfileTracer)
+
+    @profile.setter
+    def profile(self, value):
+        if value:
+            if not self.profile:
+                self.tracer = ProfileTracer()
+        elif self.profile:
+            self.tracer = None
+
+    def stats(self):
+        """
+        Returns the statistics collected since profiling was enabled, or since
+        the last call to :meth:`reset_stats`, e.g. ::
+
+            >>> serialize.profile = True
+            >>> serialize(library)
+            >>> serialize.stats()['loaders']['any2any.node.MappingNode']['cumtime']
+            0.0103
+
+        See :class:`ProfileTracer` for the format. Raises :class:`ValueError`
+        if profiling is disabled.
+        """
+        return self._get_profiler().stats()
+
+    def stats_json(self, **kwargs):
+        """
+        Returns :meth:`stats` as a JSON string. `kwargs` are passed to :func:`json.dumps`.
+        """
+        return self._get_profiler().to_json(**kwargs)
+
+    def reset_stats(self):
+        """
+        Discards the statistics collected so far.
+        """
+        self._get_profiler().reset()
+
+    def _get_profiler(self):
+        if not self.profile:
+            raise ValueError('profiling is disabled, set `profile` to enable it')
+        return self.tracer
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_local']
+        del state['_schema_cache']
+        del state['_dispatch']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._schema_cache = BoundedCache()
+        self._dispatch = (None, None, {})
+
+    @property
+    def _path(self):
+        """
+        Keys leading to the value being casted in the current thread.
+        Only maintained while tracing.
+        """
+        try:
+            return self._local.path
+        except AttributeError:
+            path = self._local.path = []
+            return path
 
     def __call__(self, inpt, dumper=NodeInfo(), loader=NodeInfo()):
-        self._depth_counter += 1
+        if self.memoize and not type(inpt) in SCALAR_TYPES:
+            return self._memoized_call(inpt, dumper, loader)
+        if not self.tracer is None:
+            return self._traced_call(inpt, dumper, loader)
+        return self._call(inpt, dumper, loader)
 
+    def _call(self, inpt, dumper, loader):
+        """
+        Casts `inpt`, without tracing or memoizing.
+        """
         # First, looking for a proper dumper for `inpt`.
-        dschema = None
-        if hasattr(inpt, '__dump__'):
-            dumper = inpt
-            inpt_iter = dumper.__dump__()
-            if hasattr(inpt, '__dschema__'):
-                dschema = inpt.__dschema__()
+        dumper = self._resolve_dumper(inpt, dumper)
+        inpt_iter, dschema = self._dump(inpt, dumper)
+
+        # Then, looking for a proper loader.
+        loader = self._resolve_loader(inpt, dumper, loader)
+        lschema = self._lschema(loader)
+
+        # Generator iterating on the dumped data, and which will be passed
+        # to the loader. Calls the casting recursively if the schema has any nesting.
+        generator = _Generator(self, inpt_iter, dschema, lschema,
+            _has_ordered_keys(dumper))
+
+        # Finally, we load the casted object.
+        return loader.__load__(generator)
+
+    def _traced_call(self, inpt, dumper, loader):
+        """
+        Same as :meth:`__call__`, but sends the events to :attr:`tracer`.
+        """
+        tracer = self.tracer
+        path = tuple(self._path)
+        start = default_timer()
+        tracer.enter(path, inpt)
+        dumper = self._resolve_dumper(inpt, dumper)
+        inpt_iter, dschema = self._dump(inpt, dumper)
+        loader = self._resolve_loader(inpt, dumper, loader)
+        lschema = self._lschema(loader)
+        tracer.resolve(path, inpt, dumper, loader)
+        casted = loader.__load__(_Generator(self, inpt_iter, dschema, lschema,
+            _has_ordered_keys(dumper)))
+        tracer.leave(path, inpt, casted, default_timer() - start)
+        return casted
+
+    def _memoized_call(self, inpt, dumper, loader):
+        """
+        Same as :meth:`__call__`, but reuses the objects already casted in the call.
+        """
+        memo = getattr(self._local, 'memo', None)
+        if memo is None:
+            self._local.memo = {}
+            try:
+                return self._memoized_call(inpt, dumper, loader)
+            finally:
+                del self._local.memo
+        key, casted = _memo_get(memo, inpt, dumper, loader)
+        if not casted is _not_casted:
+            return casted
+        if not key is None:
+            memo[key] = (inpt, _in_progress)
+        if self.tracer is None:
+            casted = self._call(inpt, dumper, loader)
         else:
-            # if neither `inpt` nor `dumper` actually have a `__dump__`
-            # method, we need to find a suitable dumper from `node_class_map`.
-            if not hasattr(dumper, '__dump__'):
-                node_info = None
-                if not isinstance(dumper, NodeInfo):
-                    node_info = NodeInfo(dumper)
-                else:
-                    node_info = copy.copy(dumper)
-                    if node_info.class_info is None:
-                        node_info.class_info = [type(inpt)]
-                dumper = self._resolve_node_class(inpt, node_info, '__dump__')
+            casted = self._traced_call(inpt, dumper, loader)
+        if not key is None:
+            memo[key] = (inpt, casted)
+        return casted
 
-            inpt_iter = dumper.__dump__(inpt)
-            if hasattr(dumper, '__dschema__'):
-                dschema = dumper.__dschema__(inpt)
+    def compile(self, dumper=NodeInfo(), loader=NodeInfo()):
+        """
+        Returns a function ``plan(inpt)``, equivalent to
+        ``cast(inpt, dumper=dumper, loader=loader)``, but which resolves the
+        node classes and the loader schemas only once per type of input.
+        Nested values are cast by child plans, created for each pair of
+        dumper and loader found in the schemas. For example ::
 
-        if dschema is None:
-            dschema = self.default_dschema()
-        dschema = AttrDict(dschema)
+            >>> serialize_books = serialize.compile(loader=NodeInfo(list))
+            >>> [serialize_books(books) for books in library]
+
+        Inputs which have a ``__dump__`` method are always cast dynamically,
+        as well as all the inputs while tracing or memoizing.
+        """
+        return _Plan(self, dumper, loader)
+
+    def map(self, iterable, dumper=NodeInfo(), loader=NodeInfo()):
+        """
+        Returns an iterator casting the items of `iterable` one by one, as they are
+        consumed. The node classes resolved for the first item are reused for all
+        the next items of the same type, and only resolved again if the type of
+        the items changes. For example ::
+
+            >>> for obj in serialize.map(authors, dumper=AuthorNode):
+            ...     send(obj)
+        """
+        return itertools.imap(self.compile(dumper, loader), iterable)
+
+    def parallel_map(self, items, dumper=NodeInfo(), loader=NodeInfo(),
+        processes=None, chunksize=None):
+        """
+        Casts all the `items` in a pool of `processes` processes (by default,
+        as many as CPUs), and returns the list of results, in the same order as `items`.
+        `items` are sent to the processes by chunks of `chunksize` items.
 
+        The cast, `dumper`, `loader`, the items and the results must be picklable.
+        Node classes created with :meth:`Node.get_subclass` are picklable
+        if their attributes are.
+        """
+        # The cast is pickled explicitly, so that processes always rebuild it
+        # the same way, whether they are forked or not.
+        pool = multiprocessing.Pool(processes, _init_worker,
+            (cPickle.dumps((self, dumper, loader), cPickle.HIGHEST_PROTOCOL),))
+        try:
+            return pool.map(_cast_in_worker, items, chunksize)
+        finally:
+            pool.close()
+            pool.join()
+
+    def default_dschema(self):
+        return {AttrDict.KeyAny: _no_node_info}
+
+    def default_lschema(self):
+        return {AttrDict.KeyAny: _no_node_info}
+
+    def _resolve_dumper(self, inpt, dumper):
+        """
+        Returns the object whose `__dump__` method will be used for `inpt`.
+        """
+        if hasattr(inpt, '__dump__'):
+            return inpt
+        # if neither `inpt` nor `dumper` actually have a `__dump__`
+        # method, we need to find a suitable dumper from `node_class_map`.
+        if not hasattr(dumper, '__dump__'):
+            # If the NodeInfo doesn't contain class information,
+            # the class of `inpt` is used.
+            dumper = self._resolve_node_class(inpt, _as_node_info(dumper), '__dump__')
+        return dumper
+
+    def _resolve_loader(self, inpt, dumper, loader):
+        """
+        Returns the object whose `__load__` method will be used to load `inpt`.
+        """
         # if `loader` doesn't actually have a `__load__` method,
         # we need to find a suitable loader from `node_class_map`,
         # or `fallback_map`.
         if not hasattr(loader, '__load__'):
-            node_info = None
-            if not isinstance(loader, NodeInfo):
-                node_info = NodeInfo(loader)
-            else:
-                node_info = copy.copy(loader)
+            node_info = _as_node_info(loader)
 
             # If the NodeInfo doesn't provide any useful `class_info` about
             # the node class, we directly try to find a good fallback.
@@ -63,32 +304,74 @@ class Cast(object):
                 loader = self._get_fallback(inpt, dumper)
             else:
                 loader = self._resolve_node_class(inpt, node_info, '__load__')
+        return loader
 
-        if hasattr(loader, '__lschema__'):
-            lschema = loader.__lschema__()
+    def _dump(self, inpt, dumper):
+        """
+        Dumps `inpt` with `dumper`, and returns ``(items_iter, dschema)``.
+        """
+        if dumper is inpt:
+            inpt_iter = inpt.__dump__()
         else:
-            lschema = self.default_lschema()
-        lschema = AttrDict(lschema)
-
-        # Generator iterating on the dumped data, and which will be passed
-        # to the loader. Calls the casting recursively if the schema has any nesting.
-        generator = _Generator(self, inpt_iter, dschema, lschema)
+            inpt_iter = dumper.__dump__(inpt)
+        if _has_static_schema(dumper, '__dschema__'):
+            key = ('__dschema__', dumper)
+            dschema = self._schema_cache.get(key)
+            if dschema is None:
+                dschema = self._schema_cache[key] = self._dschema(inpt, dumper)
+            return inpt_iter, dschema
+        return inpt_iter, self._dschema(inpt, dumper)
 
-        # Finally, we load the casted object.
-        self.log('%s <= %s' % (dumper, inpt))
-        casted = loader.__load__(generator)
-        self.log('%s => %s' % (loader, casted))
-        self._depth_counter -= 1
-        return casted
+    def _dschema(self, inpt, dumper):
+        """
+        Returns the schema of `inpt` dumped with `dumper`, as a :class:`FrozenAttrDict`.
+        """
+        dschema = None
+        if dumper is inpt:
+            if hasattr(inpt, '__dschema__'):
+                dschema = inpt.__dschema__()
+        elif hasattr(dumper, '__dschema__'):
+            dschema = dumper.__dschema__(inpt)
+        if dschema is None:
+            dschema = self.default_dschema()
+        return _frozen(dschema)
 
-    def default_dschema(self):
-        return {AttrDict.KeyAny: NodeInfo()}
+    def _lschema(self, loader):
+        """
+        Returns the schema of `loader`, as a :class:`FrozenAttrDict`.
+        The schemas of node classes are computed only once per class
+        if their ``static_schema`` attribute is `True`.
+        """
+        if _has_static_schema(loader, '__lschema__'):
+            key = ('__lschema__', loader)
+            lschema = self._schema_cache.get(key)
+            if lschema is None:
+                lschema = self._schema_cache[key] = self._new_lschema(loader)
+            return lschema
+        return self._new_lschema(loader)
 
-    def default_lschema(self):
-        return {AttrDict.KeyAny: NodeInfo()}
+    def _new_lschema(self, loader):
+        """
+        Returns the schema of `loader`, bypassing the cache.
+        """
+        if hasattr(loader, '__lschema__'):
+            lschema = loader.__lschema__()
+        else:
+            lschema = self.default_lschema()
+        return _frozen(lschema)
 
-    def log(self, msg):
-        if self.debug: print '\t' * self._depth_counter, msg
+    def _passes_through(self, inpt, dumper, loader):
+        """
+        Returns `True` if casting `inpt` with `dumper` and `loader` would just
+        return `inpt`, i.e. if both resolve to :class:`IdentityNode`
+        and `inpt` is of one of the :data:`SCALAR_TYPES`.
+        """
+        if (not type(inpt) in SCALAR_TYPES or isinstance(dumper, types.FunctionType)
+            or isinstance(loader, types.FunctionType)):
+            return False
+        dumper = self._resolve_dumper(inpt, dumper)
+        loader = self._resolve_loader(inpt, dumper, loader)
+        return _is_identity(dumper, '__dump__') and _is_identity(loader, '__load__')
 
     def _get_fallback(self, inpt, dumper):
         """
@@ -105,7 +388,29 @@ class Cast(object):
 
     def _resolve_node_class(self, inpt, node_info, method):
         """
-        Resolves the node class from a node info.
+        Resolves the node class from a node info. For inputs of one of the
+        :data:`DISPATCH_TYPES`, the result is memoized in a dispatch table,
+        which is emptied whenever :attr:`node_class_map` is modified.
+        """
+        if type(inpt) in DISPATCH_TYPES:
+            node_class_map = self.node_class_map
+            mapping, version, table = self._dispatch
+            if not (mapping is node_class_map and version == node_class_map.version):
+                table = {}
+                self._dispatch = (node_class_map, node_class_map.version, table)
+            key = (type(inpt), node_info, method)
+            try:
+                return table[key]
+            except KeyError:
+                node_class = table[key] = self._find_node_class(inpt, node_info, method)
+                return node_class
+            except TypeError: # `node_info` not hashable
+                pass
+        return self._find_node_class(inpt, node_info, method)
+
+    def _find_node_class(self, inpt, node_info, method):
+        """
+        Searches the node class for `inpt` from a node info.
         """
         # TODO: duck typing (get_subclass could be a function).
         klass = node_info.get_class(type(inpt))
@@ -121,16 +426,434 @@ class Cast(object):
             return klass.get_subclass(**node_info.kwargs)
 
 
+_worker_plan = None
+
+
+def _init_worker(pickled):
+    """
+    Initializes a process of the pool used by :meth:`Cast.parallel_map`.
+    """
+    global _worker_plan
+    cast, dumper, loader = cPickle.loads(pickled)
+    _worker_plan = cast.compile(dumper, loader)
+
+
+def _cast_in_worker(inpt):
+    return _worker_plan(inpt)
+
+
+_node_info_cache = BoundedCache()
+
+
+def _as_node_info(node):
+    """
+    Returns `node` if it is a :class:`NodeInfo`, or else a :class:`NodeInfo` of class `node`.
+    NodeInfo are immutable, so they are created only once per class.
+    """
+    if isinstance(node, NodeInfo):
+        return node
+    try:
+        node_info = _node_info_cache.get(node)
+        if node_info is None:
+            node_info = _node_info_cache[node] = NodeInfo(node)
+        return node_info
+    except TypeError: # `node` not hashable
+        return NodeInfo(node)
+
+
+def _has_static_schema(node, method):
+    """
+    Returns `True` if the schema returned by `method` of `node` can be cached.
+    ``static_schema`` only applies to the class setting it, and to the classes
+    created from it with :meth:`Node.get_subclass`, which are not modified,
+    unless they override `method`.
+    """
+    if not isinstance(node, type):
+        return False
+    for klass in node.__mro__:
+        attrs = klass.__dict__
+        if 'static_schema' in attrs:
+            return attrs['static_schema']
+        if method in attrs or not '_subclass_recipe' in attrs:
+            return False
+    return False
+
+
+def _frozen(schema):
+    """
+    Returns `schema` as a :class:`FrozenAttrDict`. Schemas which already are
+    :class:`FrozenAttrDict` are immutable, so they are returned as is.
+    """
+    if type(schema) is FrozenAttrDict:
+        return schema
+    return FrozenAttrDict(schema)
+
+
+def _call_factory(memo, node):
+    """
+    If `node` is a function returning a node (e.g. for recursive schemas), returns
+    the node it returns. Functions are called only once per `memo`.
+    """
+    if isinstance(node, types.FunctionType):
+        try:
+            return memo[node]
+        except KeyError:
+            created = memo[node] = node()
+            return created
+    return node
+
+
+def _is_identity(node, method):
+    """
+    Returns `True` if `node` is an :class:`IdentityNode` whose `method` isn't overriden.
+    """
+    if not (isinstance(node, type) and issubclass(node, IdentityNode)):
+        return False
+    for klass in node.__mro__:
+        if method in klass.__dict__:
+            return klass is IdentityNode
+    return False
+
+
+class IterativeCast(Cast):
+    """
+    Cast producing the same results as :class:`Cast`, but which doesn't recurse
+    for casting nested values. Instead, it walks the dumped items with an explicit
+    stack, so it can cast objects nested deeper than the recursion limit.
+
+    The difference with :class:`Cast` is that the values of an object are all casted
+    before its loader is called, and its `__load__` method receives an iterator
+    over the already casted items. Loaders whose ``lazy`` attribute is `True`
+    receive a generator casting the values on demand, as with :class:`Cast`.
+    """
+
+    def _call(self, inpt, dumper, loader):
+        tracer = self.tracer
+        memo = getattr(self._local, 'memo', None) if self.memoize else None
+        passthrough = {}
+        factories = {}
+        stack = []
+        frame = self._enter(inpt, dumper, loader, None, None, tracer)
+        while True:
+            if not frame is None:
+                if getattr(frame.loader, 'lazy', False):
+                    # The loader will pull the values when needed, so they are
+                    # casted by a regular generator.
+                    casted = self._leave(frame, _Generator(self, frame.items_iter,
+                        frame.dschema, frame.lschema, frame.ordered_keys), tracer, memo)
+                    if not stack:
+                        return casted
+                    stack[-1].items.append((frame.key, casted))
+                else:
+                    stack.append(frame)
+                frame = None
+
+            top = stack[-1]
+            try:
+                key, value = top.items_iter.next()
+            except StopIteration:
+                stack.pop()
+                casted = self._leave(top, _CastedItems(top.items, top.ordered_keys),
+                    tracer, memo)
+                if not stack:
+                    return casted
+                stack[-1].items.append((top.key, casted))
+                continue
+
+            if key is AttrDict.KeyFinal:
+                top.items.append((key, value))
+                continue
+            if not key in top.lschema:
+                raise NotIncludedError("loader schema doesn't contain key '%s'" % key)
+            dumper = _call_factory(factories, top.dschema[key])
+            loader = _call_factory(factories, top.lschema[key])
+            if (tracer is None and type(value) in SCALAR_TYPES
+                and _memoized_passes_through(self, passthrough, value, dumper, loader)):
+                top.items.append((key, value))
+                continue
+            memo_key = None
+            if not memo is None and not type(value) in SCALAR_TYPES:
+                memo_key, casted = _memo_get(memo, value, dumper, loader)
+                if not casted is _not_casted:
+                    top.items.append((key, casted))
+                    continue
+                if not memo_key is None:
+                    memo[memo_key] = (value, _in_progress)
+            frame = self._enter(value, dumper, loader, key, top, tracer)
+            frame.memo_key = memo_key
+
+    # The casting is traced by :meth:`_call` itself.
+    _traced_call = _call
+
+    def _enter(self, inpt, dumper, loader, key, parent, tracer):
+        """
+        Resolves the dumper and loader for `inpt`, dumps it, and returns
+        the frame to push on the stack.
+        """
+        path = start = None
+        if not tracer is None:
+            path = () if parent is None else parent.path + (key,)
+            start = default_timer()
+            tracer.enter(path, inpt)
+        dumper = self._resolve_dumper(inpt, dumper)
+        inpt_iter, dschema = self._dump(inpt, dumper)
+        loader = self._resolve_loader(inpt, dumper, loader)
+        lschema = self._lschema(loader)
+        if not tracer is None:
+            tracer.resolve(path, inpt, dumper, loader)
+        return _Frame(inpt, key, loader, inpt_iter, dschema, lschema,
+            _has_ordered_keys(dumper), path, start)
+
+    def _leave(self, frame, items_iter, tracer, memo):
+        """
+        Loads the casted object of `frame` from `items_iter`.
+        """
+        casted = frame.loader.__load__(items_iter)
+        if not frame.memo_key is None:
+            memo[frame.memo_key] = (frame.inpt, casted)
+        if not tracer is None:
+            tracer.leave(frame.path, frame.inpt, casted, default_timer() - frame.start)
+        return casted
+
+
+class ConcurrentCast(Cast):
+    """
+    Cast producing the same results as :class:`Cast`, but which casts the values
+    of an object concurrently, in a pool of `max_workers` threads. This is useful
+    when nodes perform I/O, for example a `__load__` method fetching related data,
+    so that siblings don't wait for each other. Nodes may be called from several
+    threads at once.
+
+    The values are still passed to the loader in the order they are dumped.
+    At most `max_workers` values are dumped ahead of the loader. When all the
+    threads of the pool are busy, the values are casted by the thread which
+    needs them, while it waits for the values being casted in the pool.
+    That way, nested objects never wait for a free thread.
+
+    Loaders whose ``lazy`` attribute is `True`, dumpers whose ``sequential``
+    attribute is `True`, as well as all the casting while tracing or memoizing,
+    and plans returned by :meth:`compile`, cast the values sequentially.
+    Dumpers set ``sequential`` when their values must be casted in order,
+    one after the other, like the cursors of :func:`any2any.jsonstream.load_json`.
+    """
+
+    def __init__(self, node_class_map, fallback_map={}, max_workers=4):
+        super(ConcurrentCast, self).__init__(node_class_map, fallback_map)
+        self.max_workers = max_workers
+        self._init_pool()
+
+    def _init_pool(self):
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.Semaphore(self.max_workers)
+
+    def close(self):
+        """
+        Stops the threads of the pool. They are started again if the cast is called.
+        """
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if not pool is None:
+            pool.close()
+            pool.join()
+
+    def __getstate__(self):
+        state = super(ConcurrentCast, self).__getstate__()
+        for name in ['_pool', '_pool_lock', '_slots']:
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        super(ConcurrentCast, self).__setstate__(state)
+        self._init_pool()
+
+    def _call(self, inpt, dumper, loader):
+        dumper = self._resolve_dumper(inpt, dumper)
+        inpt_iter, dschema = self._dump(inpt, dumper)
+        loader = self._resolve_loader(inpt, dumper, loader)
+        lschema = self._lschema(loader)
+        if (self.memoize or getattr(loader, 'lazy', False)
+            or getattr(dumper, 'sequential', False)):
+            generator_class = _Generator
+        else:
+            generator_class = _ConcurrentGenerator
+        return loader.__load__(generator_class(self, inpt_iter, dschema, lschema,
+            _has_ordered_keys(dumper)))
+
+    def _submit(self, function, *args):
+        """
+        Calls ``function(*args)`` in the pool if a thread is free, or else returns
+        a :class:`_Deferred` call. Returns an object whose `get` method returns the result.
+        """
+        if not self._slots.acquire(False):
+            return _Deferred(function, args)
+        try:
+            return self._get_pool().apply_async(_call_and_release,
+                (self._slots, function, args))
+        except:
+            self._slots.release()
+            raise
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPool(self.max_workers)
+            return self._pool
+
+
+def _call_and_release(semaphore, function, args):
+    try:
+        return function(*args)
+    finally:
+        semaphore.release()
+
+
+class _Done(object):
+    """
+    Result known right away, with the same interface as the results
+    of the pool of :class:`ConcurrentCast`.
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def ready(self):
+        return True
+
+    def get(self):
+        return self.value
+
+
+class _Deferred(object):
+    """
+    Call of a function postponed until :meth:`run` or :meth:`get` is called,
+    because all the threads of the pool of :class:`ConcurrentCast` were busy.
+    """
+
+    __slots__ = ('function', 'args', '_done', '_result', '_exc_info')
+
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
+        self._done = False
+        self._result = None
+        self._exc_info = None
+
+    def ready(self):
+        return self._done
+
+    def run(self):
+        try:
+            self._result = self.function(*self.args)
+        except Exception:
+            self._exc_info = sys.exc_info()
+        self._done = True
+
+    def get(self):
+        if not self._done:
+            self.run()
+        if not self._exc_info is None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+
+_not_casted = object()
+_in_progress = object()
+
+
+def _memo_get(memo, inpt, dumper, loader):
+    """
+    Returns ``(key, casted)``, where `casted` is the object already casted from `inpt`
+    with `dumper` and `loader` in `memo`, or `_not_casted`. `key` is `None` if
+    `dumper` or `loader` are not hashable. Raises :class:`CycleError` if `inpt`
+    is still being casted. The inputs are kept in `memo`, so that their id
+    isn't reused during the call.
+    """
+    key = (id(inpt), dumper, loader)
+    try:
+        casted = memo[key][1]
+    except KeyError:
+        return key, _not_casted
+    except TypeError: # `dumper` or `loader` not hashable
+        return None, _not_casted
+    if casted is _in_progress:
+        raise CycleError("%s object contains itself" % type(inpt).__name__)
+    return key, casted
+
+
+def _memoized_passes_through(cast, memo, inpt, dumper, loader):
+    """
+    :meth:`Cast._passes_through`, memoized by type of `inpt`, `dumper` and `loader` in `memo`.
+    """
+    try:
+        return memo[(type(inpt), dumper, loader)]
+    except KeyError:
+        passes = memo[(type(inpt), dumper, loader)] = cast._passes_through(inpt,
+            dumper, loader)
+        return passes
+    except TypeError: # `dumper` or `loader` not hashable
+        return False
+
+
+class _Frame(object):
+    """
+    Casting of one value by :class:`IterativeCast`.
+    """
+
+    __slots__ = ('inpt', 'key', 'loader', 'items_iter', 'dschema', 'lschema',
+        'ordered_keys', 'path', 'start', 'items', 'memo_key')
+
+    def __init__(self, inpt, key, loader, items_iter, dschema, lschema,
+        ordered_keys, path, start):
+        self.inpt = inpt
+        self.key = key
+        self.loader = loader
+        self.items_iter = items_iter
+        self.dschema = dschema
+        self.lschema = lschema
+        self.ordered_keys = ordered_keys
+        self.path = path
+        self.start = start
+        self.items = []
+        self.memo_key = None
+
+
+class _CastedItems(object):
+    """
+    Iterator over items already casted, passed to loaders by :class:`IterativeCast`.
+    """
+
+    def __init__(self, items, ordered_keys):
+        self._iter = iter(items)
+        self.ordered_keys = ordered_keys
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        return self._iter.next()
+
+
 class _Generator(object):
     """
     Generator used to pass the data from one node to another.
     """
 
-    def __init__(self, cast, items_iter, dschema, lschema):
+    def __init__(self, cast, items_iter, dschema, lschema, ordered_keys=False):
         self.cast = cast
         self.items_iter = items_iter
         self.dschema = dschema
         self.lschema = lschema
+        self.ordered_keys = ordered_keys
+        self._passthrough = {}
+        self._factories = {}
+        # If all the values have the same dumper and loader, we look them up only once.
+        self._any = None
+        if (dschema.has_any and lschema.has_any and len(dschema) == 1
+            and len(lschema) == 1):
+            self._any = (dschema.default, lschema.default)
 
     def __iter__(self):
         return self
@@ -141,16 +864,176 @@ class _Generator(object):
         if key is AttrDict.KeyFinal:
             casted_value = value
         else:
-            if not key in self.lschema:
+            if self._any is None and not key in self.lschema:
                 raise NotIncludedError("loader schema doesn't contain key '%s'" % key)
+            if self.cast.tracer is None:
+                casted_value = self.cast_value(key, value)
+            else:
+                path = self.cast._path
+                path.append(key)
+                try:
+                    casted_value = self.cast_value(key, value)
+                finally:
+                    path.pop()
+        return key, casted_value
+
+    def cast_value(self, key, value):
+        """
+        Casts `value`, found at `key`, according to the schemas.
+        """
+        if self._any is None:
             dumper = self.dschema[key]
             loader = self.lschema[key]
-            if isinstance(dumper, types.FunctionType): dumper = dumper()
-            if isinstance(loader, types.FunctionType): loader = loader()
-            self.cast.log('[ %s ]' % key)
-            casted_value = self.cast(value,
-                dumper=dumper,
-                loader=loader,
-            )
-        return key, casted_value
+        else:
+            dumper, loader = self._any
+        dumper = _call_factory(self._factories, dumper)
+        loader = _call_factory(self._factories, loader)
+        # Scalars which would be casted with IdentityNode are copied straight away.
+        if (type(value) in SCALAR_TYPES and self.cast.tracer is None
+            and _memoized_passes_through(self.cast, self._passthrough, value, dumper, loader)):
+            return value
+        return self.cast(value,
+            dumper=dumper,
+            loader=loader,
+        )
+
+
+class _Plan(object):
+    """
+    Function returned by :meth:`Cast.compile`. For each type of input,
+    it keeps the resolved dumper, loader and loader schema, or `None`
+    for scalars that are returned as is. They are resolved again
+    whenever :attr:`Cast.node_class_map` or :attr:`Cast.fallback_map`
+    is modified or replaced.
+    """
+
+    def __init__(self, cast, dumper, loader):
+        self.cast = cast
+        self.dumper = dumper
+        self.loader = loader
+        self._maps = None
+        self._steps = {}
+        self._children = {}
+
+    def __call__(self, inpt):
+        cast = self.cast
+        if not cast.tracer is None or cast.memoize or hasattr(inpt, '__dump__'):
+            return cast(inpt, dumper=self.dumper, loader=self.loader)
+        node_class_map, fallback_map = cast.node_class_map, cast.fallback_map
+        maps = self._maps
+        if (maps is None or not maps[0] is node_class_map
+            or maps[1] != node_class_map.version or not maps[2] is fallback_map
+            or maps[3] != fallback_map.version):
+            self._steps = {}
+            self._children = {}
+            self._maps = (node_class_map, node_class_map.version,
+                fallback_map, fallback_map.version)
+        try:
+            step = self._steps[type(inpt)]
+        except KeyError:
+            step = self._steps[type(inpt)] = self._resolve(inpt)
+        if step is None:
+            return inpt
+        dumper, loader, lschema = step
+        inpt_iter, dschema = cast._dump(inpt, dumper)
+        return loader.__load__(_PlanGenerator(self, inpt_iter, dschema, lschema,
+            _has_ordered_keys(dumper)))
+
+    def _resolve(self, inpt):
+        # `None` means that values of this type are returned as is.
+        if self.cast._passes_through(inpt, self.dumper, self.loader):
+            return None
+        dumper = self.cast._resolve_dumper(inpt, self.dumper)
+        loader = self.cast._resolve_loader(inpt, dumper, self.loader)
+        return dumper, loader, self.cast._lschema(loader)
+
+    def child(self, dumper, loader):
+        """
+        Returns the plan for casting nested values with `dumper` and `loader`.
+        """
+        try:
+            return self._children[(dumper, loader)]
+        except KeyError:
+            plan = self._children[(dumper, loader)] = self._new_child(dumper, loader)
+            return plan
+        except TypeError: # `dumper` or `loader` not hashable
+            return self._new_child(dumper, loader)
+
+    def _new_child(self, dumper, loader):
+        if isinstance(dumper, types.FunctionType): dumper = dumper()
+        if isinstance(loader, types.FunctionType): loader = loader()
+        return _Plan(self.cast, dumper, loader)
 
+
+class _PlanGenerator(_Generator):
+    """
+    Generator used by :class:`_Plan`, casting the values with child plans.
+    """
+
+    def __init__(self, plan, items_iter, dschema, lschema, ordered_keys=False):
+        super(_PlanGenerator, self).__init__(plan.cast, items_iter, dschema, lschema,
+            ordered_keys)
+        self.plan = plan
+
+    def cast_value(self, key, value):
+        return self.plan.child(self.dschema[key], self.lschema[key])(value)
+
+
+class _ConcurrentGenerator(_Generator):
+    """
+    Generator used by :class:`ConcurrentCast`, dumping the values ahead
+    of the loader and casting them in the pool of the cast.
+    """
+
+    def __init__(self, cast, items_iter, dschema, lschema, ordered_keys=False):
+        super(_ConcurrentGenerator, self).__init__(cast, items_iter, dschema, lschema,
+            ordered_keys)
+        self._pending = collections.deque()
+        self._exhausted = False
+
+    def next(self):
+        pending = self._pending
+        while len(pending) < self.cast.max_workers and not self._exhausted:
+            try:
+                key, value = self.items_iter.next()
+            except StopIteration:
+                self._exhausted = True
+                break
+            pending.append((key, self._submit(key, value)))
+        if not pending:
+            raise StopIteration
+        key, result = pending.popleft()
+        # The next values waiting for a free thread are sent to the pool if
+        # threads are free now. If not, and the value is casted in the pool,
+        # they are casted here meanwhile.
+        for i in xrange(len(pending)):
+            if result.ready():
+                break
+            other_key, other = pending[i]
+            if isinstance(other, _Deferred):
+                other = self.cast._submit(other.function, *other.args)
+                if isinstance(other, _Deferred):
+                    if isinstance(result, _Deferred):
+                        break
+                    other.run()
+                pending[i] = (other_key, other)
+        self.last_key = key
+        return key, result.get()
+
+    def _submit(self, key, value):
+        if key is AttrDict.KeyFinal:
+            return _Done(value)
+        if self._any is None and not key in self.lschema:
+            raise NotIncludedError("loader schema doesn't contain key '%s'" % key)
+        # Scalars which would be casted with IdentityNode are not worth a thread.
+        if type(value) in SCALAR_TYPES:
+            if self._any is None:
+                dumper = self.dschema[key]
+                loader = self.lschema[key]
+            else:
+                dumper, loader = self._any
+            dumper = _call_factory(self._factories, dumper)
+            loader = _call_factory(self._factories, loader)
+            if _memoized_passes_through(self.cast, self._passthrough, value, dumper, loader):
+                return _Done(value)
+        return self.cast._submit(self.cast_value, key, value)
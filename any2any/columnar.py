@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Node classes converting lists of flat records to NumPy structured arrays,
+or dicts of column arrays, and back. NumPy is an optional dependency,
+only required when these nodes are used. For example ::
+
+    >>> RecordsArray = RecordArrayNode.get_subclass(value_type=RecordNode)
+    >>> array = serialize(records, dumper=IdentityNode, loader=RecordsArray)
+    >>> array['score'].mean()
+
+When the dumper yields the whole list with ``AttrDict.KeyFinal``, like
+:class:`IdentityNode` does, the arrays are built column by column, without
+casting the records one by one. The values of the records are then not casted.
+"""
+import itertools
+import operator
+import types
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from node import Node, NodeInfo, IterableNode, _sorted_values
+from utils import AttrDict
+
+
+_DTYPES = [
+    (bool, '?'),
+    ((int, long), 'i8'),
+    (float, 'f8'),
+    (basestring, None),
+]
+"""
+NumPy types of the fields, by class. `None` means that the type is inferred from
+the values, e.g. fixed-size unicode strings. Fields of other classes are objects.
+"""
+
+
+class RecordArrayNode(Node):
+    """
+    Node class for lists of records, stored as a NumPy structured array,
+    or as a dict of column arrays if :attr:`columns` is `True`.
+
+    The fields and their types are taken from the loader schema of :attr:`value_type`,
+    e.g. ``NodeInfo(int)`` is stored as ``int64``. If :attr:`value_type`
+    has no loader schema, or if it contains ``AttrDict.KeyAny``, the fields are
+    the keys of the first record, sorted, and their types are inferred by NumPy.
+    Records are mappings, or objects with a ``__dump__`` method.
+    """
+
+    klass = NodeInfo() if numpy is None else numpy.ndarray
+
+    ordered_keys = True
+
+    static_schema = True
+
+    value_type = NodeInfo()
+    """Type of the records. Its loader schema gives the fields."""
+
+    dtype = None
+    """NumPy dtype of the structured array. If given, :attr:`value_type` is not used."""
+
+    columns = False
+    """If `True`, :meth:`__load__` returns a dict of column arrays."""
+
+    @classmethod
+    def __dump__(cls, obj):
+        names, rows = _rows(obj)
+        return ((i, dict(itertools.izip(names, row))) for i, row in enumerate(rows))
+
+    @classmethod
+    def __load__(cls, items_iter):
+        _require_numpy()
+        records = _records(items_iter)
+        names, dtypes = cls._fields(records)
+        columns = [_column(map(operator.itemgetter(name), records), dtype)
+            for name, dtype in itertools.izip(names, dtypes)]
+        if cls.columns:
+            return dict(itertools.izip(names, columns))
+        array = numpy.empty(len(records),
+            dtype=[(name, column.dtype) for name, column in itertools.izip(names, columns)])
+        for name, column in itertools.izip(names, columns):
+            array[name] = column
+        return array
+
+    @classmethod
+    def __dschema__(cls, obj):
+        return {AttrDict.KeyAny: NodeInfo(dict)}
+
+    @classmethod
+    def __lschema__(cls):
+        return {AttrDict.KeyAny: cls.value_type}
+
+    @classmethod
+    def _fields(cls, records):
+        """
+        Returns ``(names, dtypes)``, the names and NumPy types of the fields.
+        """
+        if not cls.dtype is None:
+            dtype = numpy.dtype(cls.dtype)
+            return dtype.names, [dtype.fields[name][0] for name in dtype.names]
+        lschema = getattr(cls.value_type, '__lschema__', None)
+        if not lschema is None:
+            lschema = AttrDict(lschema())
+            if not AttrDict.KeyAny in lschema:
+                names = sorted(lschema.iter_attrs())
+                return names, [_field_dtype(lschema[name]) for name in names]
+        names = sorted(records[0]) if records else []
+        return names, [None] * len(names)
+
+
+class RecordsNode(IterableNode):
+    """
+    Node class for lists of records, which can load the structured arrays and dicts
+    of column arrays dumped with ``AttrDict.KeyFinal``, like :class:`IdentityNode`
+    does. The records are loaded with the `__load__` method of :attr:`value_type`,
+    or as dicts if it has none. Other items are loaded as :class:`IterableNode` does.
+    """
+
+    static_schema = True
+
+    @classmethod
+    def __load__(cls, items_iter):
+        ordered_keys = getattr(items_iter, 'ordered_keys', False)
+        try:
+            key, value = items_iter.next()
+        except StopIteration:
+            return cls.klass()
+        if not key is AttrDict.KeyFinal:
+            items_iter = itertools.chain([(key, value)], items_iter)
+            if ordered_keys:
+                return cls.klass((v for k, v in items_iter))
+            return cls.klass(_sorted_values(items_iter, cls.reorder_buffer_size))
+
+        names, rows = _rows(value)
+        loader = getattr(cls.value_type, '__load__', None)
+        if loader is None:
+            return cls.klass(dict(itertools.izip(names, row)) for row in rows)
+        return cls.klass(loader(itertools.izip(names, row)) for row in rows)
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError('numpy is required for loading record arrays')
+
+
+def _records(items_iter):
+    """
+    Returns the list of records passed to :meth:`RecordArrayNode.__load__`,
+    as mappings.
+    """
+    ordered_keys = getattr(items_iter, 'ordered_keys', False)
+    try:
+        key, value = items_iter.next()
+    except StopIteration:
+        return []
+    if key is AttrDict.KeyFinal:
+        records = value
+    else:
+        items_iter = itertools.chain([(key, value)], items_iter)
+        if ordered_keys:
+            records = [v for k, v in items_iter]
+        else:
+            records = _sorted_values(items_iter, RecordsNode.reorder_buffer_size)
+    return [record if hasattr(record, 'keys') else dict(record.__dump__())
+        for record in records]
+
+
+def _rows(obj):
+    """
+    Returns ``(names, rows)`` for a structured array or a dict of column arrays,
+    where `rows` are tuples of Python values.
+    """
+    if isinstance(obj, dict):
+        names = sorted(obj)
+        columns = [obj[name] for name in names]
+    else:
+        names = obj.dtype.names
+        columns = [obj[name] for name in names]
+    if not names:
+        return names, []
+    return names, itertools.izip(*[column.tolist() for column in columns])
+
+
+def _field_dtype(node):
+    """
+    Returns the NumPy type of a field loaded with `node`.
+    """
+    klass = node
+    while True:
+        if isinstance(klass, NodeInfo):
+            klass = klass.get_class(object)
+        elif isinstance(klass, type) and issubclass(klass, Node):
+            klass = klass.klass
+        else:
+            break
+    if isinstance(klass, (type, types.ClassType)):
+        for classes, dtype in _DTYPES:
+            if issubclass(klass, classes):
+                return dtype
+    return object
+
+
+def _column(values, dtype):
+    """
+    Returns the array of the `values` of a field, of type `dtype`.
+    """
+    if not dtype is None and numpy.dtype(dtype) != numpy.dtype(object):
+        return numpy.array(values, dtype=dtype)
+    if dtype is None:
+        column = numpy.array(values)
+        if column.ndim == 1:
+            return column
+    # Values which are sequences must be stored as is.
+    column = numpy.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
@@ -5,3 +5,7 @@ class NoNodeClassError(Exception):
 class NotIncludedError(ValueError):
     """Error raised by :meth:`AttrDict.validate_match`, when the validation failed."""
     pass
+
+class CycleError(ValueError):
+    """Error raised by :class:`Cast` with ``memoize`` enabled, when an object contains itself."""
+    pass
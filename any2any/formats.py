@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Bases of the streaming formats, :mod:`any2any.jsonstream` and :mod:`any2any.binary` :
+writers, writing the items they are loaded from while the input is being dumped,
+and cursors, dumping the items while they are read.
+"""
+from node import Node, NodeInfo
+from utils import AttrDict, FrozenAttrDict
+
+
+class WriterNode(Node):
+    """
+    Base for the loader node classes, whose :meth:`__load__` returns
+    a :attr:`writer_class` instead of an object. Each value is then casted
+    only when it is written. Values are loaded with :attr:`value_type`.
+    """
+
+    lazy = True
+
+    static_schema = True
+
+    writer_class = None
+    """Subclass of :class:`Writer` returned by :meth:`__load__`."""
+
+    value_type = NodeInfo()
+    """Type of the values. This is used to generate the schema."""
+
+    @classmethod
+    def __load__(cls, items_iter):
+        return cls.writer_class(items_iter)
+
+    @classmethod
+    def __lschema__(cls):
+        return {AttrDict.KeyAny: cls.value_type}
+
+
+class Writer(object):
+    """
+    Base for the objects returned by :meth:`WriterNode.__load__`, writing the items
+    they were loaded from. They can be written only once. Items whose iterator
+    has ``ordered_keys`` are written as arrays, the others as maps.
+
+    Subclasses implement the hooks :meth:`_write_item`, :meth:`_write_end`
+    and :meth:`_write_value`, which are passed the output of :meth:`_write`.
+    """
+
+    __slots__ = ('items_iter',)
+
+    def __init__(self, items_iter):
+        self.items_iter = items_iter
+
+    def _take(self):
+        """
+        Returns the items, which can be consumed only once.
+        """
+        items_iter = self.items_iter
+        if items_iter is None:
+            raise ValueError('%s already written' % self.__class__.__name__)
+        self.items_iter = None
+        return items_iter
+
+    def _write(self, out):
+        # Nested writers are written in the same loop, with an explicit
+        # stack, so there is no limit to the nesting.
+        items_iter = self._take()
+        stack = [[items_iter, getattr(items_iter, 'ordered_keys', False), 0, None]]
+        while stack:
+            frame = stack[-1]
+            items_iter, is_array, count, state = frame
+            try:
+                key, value = items_iter.next()
+            except StopIteration:
+                stack.pop()
+                self._write_end(out, is_array, count, state)
+                continue
+
+            if key is AttrDict.KeyFinal:
+                stack.pop()
+                self._write_value(out, value)
+                continue
+            frame[3] = self._write_item(out, is_array, count, state, key)
+            frame[2] = count + 1
+            if isinstance(value, Writer):
+                items_iter = value._take()
+                stack.append([items_iter, getattr(items_iter, 'ordered_keys', False), 0, None])
+            else:
+                self._write_value(out, value)
+
+    def _write_item(self, out, is_array, count, state, key):
+        """
+        Writes what comes before the value of the item number `count` of a map
+        or an array. `state` is what this method returned for the previous item,
+        `None` for the first one.
+        """
+        raise NotImplementedError()
+
+    def _write_end(self, out, is_array, count, state):
+        """
+        Writes the end of a map or an array of `count` items.
+        """
+        raise NotImplementedError()
+
+    def _write_value(self, out, value):
+        """
+        Writes `value`, which isn't a :class:`Writer`.
+        """
+        raise NotImplementedError()
+
+
+class Cursor(object):
+    """
+    Base for the objects read in place of maps and arrays. A cursor is a dumper,
+    whose :meth:`__dump__` parses the items as they are consumed.
+    Nested maps and arrays are cursors as well.
+
+    A cursor can be dumped only once, and only before the next item of its
+    parent is read : the items left unconsumed by its loader are then skipped.
+    So cursors can't be loaded by lazy loaders, like :class:`StreamNode`,
+    which raise :class:`ValueError`, and :class:`ConcurrentCast` casts
+    their values sequentially.
+
+    Subclasses implement :meth:`_iter_items`.
+    """
+
+    __slots__ = ('_items_iter',)
+
+    ordered_keys = False
+
+    sequential = True
+
+    def __init__(self):
+        self._items_iter = None
+
+    def __dschema__(self):
+        return _cursor_schema
+
+    def __dump__(self):
+        if not self._items_iter is None:
+            raise ValueError('%s already dumped' % self.__class__.__name__)
+        self._items_iter = self._iter_items()
+        return self._items_iter
+
+    def skip(self):
+        """
+        Reads the items which haven't been consumed yet, and discards them.
+        Raises :class:`ValueError` if the cursor was dumped, but none of its items
+        was read yet, as happens with lazy loaders, which would read them later.
+        """
+        items_iter = self._items_iter
+        if items_iter is None:
+            items_iter = self._items_iter = self._iter_items()
+        elif _not_started(items_iter):
+            for key, value in items_iter:
+                raise ValueError("%s skipped before being read, it can't be loaded"
+                    " by a lazy loader" % self.__class__.__name__)
+            return
+        for key, value in items_iter:
+            pass
+
+    def _iter_items(self):
+        """
+        Parses the items, and yields them. Nested cursors left unconsumed
+        must be skipped before the next item is parsed.
+        """
+        raise NotImplementedError()
+
+
+_cursor_schema = FrozenAttrDict({AttrDict.KeyAny: NodeInfo()})
+
+
+def _not_started(generator):
+    """
+    Returns `True` if no item was read from `generator` yet.
+    """
+    frame = generator.gi_frame
+    return not frame is None and frame.f_lasti == -1
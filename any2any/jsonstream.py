@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+"""
+Node classes writing JSON straight to a file-like object, while the input is
+being dumped, instead of loading a tree of dicts and lists to encode afterwards.
+For example ::
+
+    >>> with open('library.json', 'w') as fd:
+    ...     dump_json(library, fd, cast=serialize_objects)
+
+And cursors reading JSON from a file-like object as it is dumped, instead of
+loading the whole file before casting it. For example ::
+
+    >>> with open('library.json') as fd:
+    ...     library = load_json(fd, loader=LibraryNode)
+"""
+import re
+import json
+import types
+from json.encoder import encode_basestring_ascii
+from json.decoder import scanstring
+from json.scanner import NUMBER_RE
+
+from node import NodeInfo
+from formats import WriterNode, Writer, Cursor
+
+
+CHUNK_SIZE = 64 * 1024
+"""Default number of characters written to, or read from the file-like object at once."""
+
+_encoder = json.JSONEncoder(separators=(',', ':'))
+
+_KEY_TYPES = frozenset([int, long, float, bool, types.NoneType])
+
+
+class JSONWriterNode(WriterNode):
+    """
+    Loader node class, whose :meth:`__load__` returns a :class:`JSONWriter`
+    instead of an object. Nothing is casted before the writer is written,
+    and then each value is casted only when it is written, so the whole
+    object is never in memory. Works with any dumper :
+
+        - a dumper whose ``ordered_keys`` is `True` is written as a JSON array
+        - a dumper yielding ``AttrDict.KeyFinal`` is written as that value
+        - any other dumper is written as a JSON object
+
+    Values are loaded with :attr:`value_type`. By default, scalars are copied as is,
+    provided that the cast maps them to :class:`IdentityNode`, and all
+    the other values are loaded with :class:`JSONWriterNode`.
+    Values loaded with other loaders are encoded with :mod:`json`.
+    """
+
+    static_schema = True
+
+
+JSONWriterNode.value_type = NodeInfo(int, float, bool, basestring, types.NoneType,
+    JSONWriterNode)
+
+
+class JSONWriter(Writer):
+    """
+    Object returned by :meth:`JSONWriterNode.__load__`, writing the items
+    it was loaded from as JSON. It can be written only once.
+    """
+
+    __slots__ = ()
+
+    def write(self, fp, chunk_size=CHUNK_SIZE):
+        """
+        Writes the JSON to `fp`, which must have a ``write`` method, by chunks
+        of about `chunk_size` characters.
+        """
+        out = _ChunkedWriter(fp, chunk_size)
+        self._write(out.write)
+        out.flush()
+
+    def getvalue(self):
+        """
+        Returns the JSON as a string.
+        """
+        parts = []
+        self._write(parts.append)
+        return ''.join(parts)
+
+    def _write_item(self, write, is_array, count, state, key):
+        if count == 0:
+            write('[' if is_array else '{')
+        else:
+            write(',')
+        if not is_array:
+            write(_encode_key(key))
+            write(':')
+
+    def _write_end(self, write, is_array, count, state):
+        if count == 0:
+            write('[]' if is_array else '{}')
+        else:
+            write(']' if is_array else '}')
+
+    def _write_value(self, write, value):
+        _write_value(write, value)
+
+
+JSONWriterNode.writer_class = JSONWriter
+
+
+def dump_json(obj, fp, cast=None, dumper=NodeInfo(), chunk_size=CHUNK_SIZE):
+    """
+    Casts `obj` with `cast` and :class:`JSONWriterNode`, and writes
+    the JSON to `fp`. By default, `cast` is :data:`any2any.serialize`.
+    """
+    if cast is None:
+        from any2any import serialize as cast
+    writer = cast(obj, dumper=dumper, loader=JSONWriterNode)
+    writer.write(fp, chunk_size)
+
+
+class _ChunkedWriter(object):
+    """
+    Buffers the strings written, and writes them to `fp` once they
+    amount to `chunk_size` characters.
+    """
+
+    __slots__ = ('fp', 'chunk_size', 'parts', 'size')
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.parts = []
+        self.size = 0
+
+    def write(self, string):
+        self.parts.append(string)
+        self.size += len(string)
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.fp.write(''.join(self.parts))
+            self.parts = []
+            self.size = 0
+
+
+def _write_value(write, value):
+    """
+    Writes the JSON of `value`, which isn't a :class:`JSONWriter`.
+    """
+    value_type = type(value)
+    if value_type is str or value_type is unicode:
+        write(encode_basestring_ascii(value))
+    elif value_type is int or value_type is long:
+        write(str(value))
+    elif value is None:
+        write('null')
+    elif value is True:
+        write('true')
+    elif value is False:
+        write('false')
+    else:
+        for chunk in _encoder.iterencode(value):
+            write(chunk)
+
+
+def _encode_key(key):
+    """
+    Returns the JSON of `key` as an object key, converting non-string keys
+    like :func:`json.dumps` does.
+    """
+    if isinstance(key, basestring):
+        return encode_basestring_ascii(key)
+    if type(key) in _KEY_TYPES:
+        return encode_basestring_ascii(_encoder.encode(key))
+    raise TypeError('key %r is not a string' % (key,))
+
+
+def load_json(fp, cast=None, loader=NodeInfo(), chunk_size=CHUNK_SIZE):
+    """
+    Reads JSON from `fp`, which must have a ``read`` method, by chunks of
+    `chunk_size` characters, and casts it with `cast` and `loader`.
+    By default, `cast` is :data:`any2any.deserialize`.
+
+    JSON objects and arrays are read with :class:`JSONObjectCursor` and
+    :class:`JSONArrayCursor`, so only the chunk being parsed is in memory.
+    Raises :class:`ValueError` if the JSON is not valid, or if an object
+    or array is loaded by a lazy loader.
+    """
+    if cast is None:
+        from any2any import deserialize as cast
+    scanner = _Scanner(fp, chunk_size)
+    root = scanner.read_value()
+    casted = cast(root, loader=loader)
+    if isinstance(root, JSONCursor):
+        root.skip()
+    if scanner.peek():
+        raise scanner.error('Extra data')
+    return casted
+
+
+class JSONCursor(Cursor):
+    """
+    Base for the :class:`any2any.formats.Cursor` read by :func:`load_json`
+    in place of JSON objects and arrays. If the cast has no loader for a cursor,
+    its :meth:`__load__` loads it to a `dict` or a `list`.
+    """
+
+    __slots__ = ('_scanner',)
+
+    def __init__(self, scanner):
+        super(JSONCursor, self).__init__()
+        self._scanner = scanner
+
+
+class JSONObjectCursor(JSONCursor):
+    """
+    Cursor on a JSON object, whose keys are unicode strings.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def __load__(cls, items_iter):
+        return dict(items_iter)
+
+    def _iter_items(self):
+        scanner = self._scanner
+        if scanner.peek() == '}':
+            scanner.pos += 1
+            return
+        while True:
+            if scanner.peek() != '"':
+                raise scanner.error('Expecting property name enclosed in double quotes')
+            key = scanner.read_string()
+            scanner.expect(':', "Expecting ':' delimiter")
+            value = scanner.read_value()
+            yield key, value
+            if isinstance(value, JSONCursor):
+                value.skip()
+            delimiter = scanner.expect(',}', "Expecting ',' delimiter")
+            if delimiter == '}':
+                return
+
+
+class JSONArrayCursor(JSONCursor):
+    """
+    Cursor on a JSON array. Its keys are the indexes, in order.
+    """
+
+    __slots__ = ()
+
+    ordered_keys = True
+
+    @classmethod
+    def __load__(cls, items_iter):
+        return [value for key, value in items_iter]
+
+    def _iter_items(self):
+        scanner = self._scanner
+        if scanner.peek() == ']':
+            scanner.pos += 1
+            return
+        index = 0
+        while True:
+            value = scanner.read_value()
+            yield index, value
+            if isinstance(value, JSONCursor):
+                value.skip()
+            delimiter = scanner.expect(',]', "Expecting ',' delimiter")
+            if delimiter == ']':
+                return
+            index += 1
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_NUMBER_CHARS = re.compile(r'[-+.0-9eE]*')
+
+_CONSTANTS = [
+    ('null', None),
+    ('true', True),
+    ('false', False),
+    ('NaN', float('nan')),
+    ('Infinity', float('inf')),
+    ('-Infinity', float('-inf')),
+]
+
+_MAX_CONSTANT_LENGTH = max(len(name) for name, value in _CONSTANTS)
+
+
+class _Scanner(object):
+    """
+    Parses the JSON read from `fp`. Only the characters not parsed yet
+    are kept in :attr:`buf`, from :attr:`pos`.
+    """
+
+    __slots__ = ('fp', 'chunk_size', 'buf', 'pos', 'offset', 'eof')
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.offset = 0 # position of `buf` in the file
+        self.eof = False
+
+    def error(self, message):
+        return ValueError('%s: char %s' % (message, self.offset + self.pos))
+
+    def read_value(self):
+        """
+        Parses the next value. Objects and arrays are returned as cursors.
+        """
+        char = self.peek()
+        if char == '"':
+            return self.read_string()
+        elif char == '{':
+            self.pos += 1
+            return JSONObjectCursor(self)
+        elif char == '[':
+            self.pos += 1
+            return JSONArrayCursor(self)
+        return self.read_scalar()
+
+    def read_string(self):
+        """
+        Parses the string starting at :attr:`pos`.
+        """
+        # The whole string must be in the buffer, because `scanstring` can't resume.
+        searched = 1 # number of characters searched for the closing quote, from `pos`
+        while True:
+            end = self.buf.find('"', self.pos + searched)
+            if end == -1:
+                searched = len(self.buf) - self.pos
+                if not self._fill(searched):
+                    raise self.error('Unterminated string starting at')
+                continue
+            searched = end + 1 - self.pos
+            # Quotes preceded by an odd number of backslashes are escaped.
+            start = end
+            while self.buf[start - 1] == '\\':
+                start -= 1
+            if (end - start) % 2 == 0:
+                string, self.pos = scanstring(self.buf, self.pos + 1)
+                return string
+
+    def read_scalar(self):
+        """
+        Parses the number or constant starting at :attr:`pos`.
+        """
+        while (len(self.buf) - self.pos < _MAX_CONSTANT_LENGTH
+            and self._fill(_MAX_CONSTANT_LENGTH)):
+            pass
+        # The number can go on in the next chunk.
+        while (_NUMBER_CHARS.match(self.buf, self.pos).end() == len(self.buf)
+            and self._fill(0)):
+            pass
+        match = NUMBER_RE.match(self.buf, self.pos)
+        if not match is None:
+            integer, frac, exp = match.groups()
+            self.pos = match.end()
+            if frac or exp:
+                return float(integer + (frac or '') + (exp or ''))
+            return int(integer)
+        for name, value in _CONSTANTS:
+            if self.buf.startswith(name, self.pos):
+                self.pos += len(name)
+                return value
+        raise self.error('Expecting value')
+
+    def peek(self):
+        """
+        Skips whitespaces, and returns the next character, or '' at the end of the file.
+        """
+        if self.pos < len(self.buf):
+            char = self.buf[self.pos]
+            if not char in ' \t\n\r':
+                return char
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill(0):
+                return ''
+
+    def expect(self, chars, message):
+        """
+        Skips whitespaces, and consumes the next character, which must be one of `chars`.
+        """
+        char = self.peek()
+        if not char or not char in chars:
+            raise self.error(message)
+        self.pos += 1
+        return char
+
+    def _fill(self, size):
+        """
+        Discards the characters parsed, and reads at least `size` characters more,
+        or a chunk. Returns `False` at the end of the file.
+        """
+        if self.eof:
+            return False
+        data = self.fp.read(max(size, self.chunk_size))
+        if not data:
+            self.eof = True
+            return False
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
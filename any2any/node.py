@@ -1,5 +1,16 @@
 # -*- coding: utf-8 -*-
-from utils import ClassSetDict, AttrDict, AllSubSetsOf
+import heapq
+import types
+import copy_reg
+
+from utils import ClassSetDict, AttrDict, AllSubSetsOf, BoundedCache, _pickle_class
+
+
+subclass_cache = BoundedCache(max_size=1024)
+"""
+Cache of the classes created by :meth:`Node.get_subclass`, so that identical calls
+return the same class. Its ``hits`` and ``misses`` attributes count the lookups.
+"""
 
 
 class NodeInfo(object):
@@ -24,48 +35,140 @@ class NodeInfo(object):
 
     If the input doesn't match any of the class provided, the last class
     of the list is taken as default.
+
+    NodeInfo are immutable, so they can be shared and need not be copied.
+    Two NodeInfo with the same classes and attributes are equal, and have
+    the same hash, if the attributes are hashable.
     """
 
+    __slots__ = ('_raw_class_info', '_class_info', '_kwargs', '_hash')
+
     def __init__(self, *class_info, **kwargs):
         if len(class_info) == 0:
             self._raw_class_info = None
+            self._class_info = None
         else:
-            self.class_info = class_info
+            self._raw_class_info = class_info
+            # Dealing with `class_info`, which can be of different types
+            self._class_info = ClassSetDict()
+            for klass in class_info[:-1]:
+                self._class_info[AllSubSetsOf(klass)] = klass
+            # We use the last class of the list as a fallback
+            self._class_info[AllSubSetsOf(object)] = class_info[-1]
 
         # Those will be used for building the final node class        
-        self.kwargs = kwargs
+        self._kwargs = dict(kwargs)
+        try:
+            self._hash = hash((self._raw_class_info, frozenset(kwargs.iteritems())))
+        except TypeError: # some attributes are not hashable
+            self._hash = None
 
     def __repr__(self):
         return '%s(%s)' % (self.__class__.__name__, self._raw_class_info or '')
 
+    def __setattr__(self, name, value):
+        if hasattr(self, '_hash'):
+            raise AttributeError("%s is immutable" % self.__class__.__name__)
+        super(NodeInfo, self).__setattr__(name, value)
+
     def __copy__(self):
-        if self._raw_class_info is None:
-            return NodeInfo(**self.kwargs)
-        else:
-            return NodeInfo(*self._raw_class_info, **self.kwargs)
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        class_info = self._raw_class_info
+        if not class_info is None:
+            class_info = map(_pickle_class, class_info)
+        return _rebuild_node_info, (class_info, self._kwargs)
+
+    def __eq__(self, other):
+        if isinstance(other, NodeInfo):
+            return (self._raw_class_info == other._raw_class_info
+                and self._kwargs == other._kwargs)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        if self._hash is None:
+            raise TypeError("unhashable %s, attributes %s are not hashable"
+                % (self.__class__.__name__, self._kwargs))
+        return self._hash
 
     def get_class(self, klass):
         """
         Chose a single class, given the input class of the casting.
+        If the NodeInfo doesn't contain class information, this is `klass`.
         """
+        if self._class_info is None:
+            return klass
         return self._class_info.subsetget(klass)
 
+    @property
+    def kwargs(self):
+        """
+        The attributes to set on the node class, as a new `dict`,
+        so that modifying it doesn't modify the NodeInfo.
+        """
+        return self._kwargs.copy()
+
     @property
     def class_info(self):
         """
         A :class:`ClassSetDict` if the NodeInfo contains class information, `None` otherwise.
         """
-        return getattr(self, '_class_info', None)
+        return self._class_info
+
 
-    @class_info.setter
-    def class_info(self, class_list):
-        self._raw_class_info = class_list
-        # Dealing with `class_info`, which can be of different types
-        self._class_info = ClassSetDict()
-        for klass in class_list[:-1]:
-            self._class_info[AllSubSetsOf(klass)] = klass
-        # We use the last class of the list as a fallback
-        self._class_info[AllSubSetsOf(object)] = class_list[-1]
+def _rebuild_node_info(class_info, kwargs):
+    if class_info is None:
+        return NodeInfo(**kwargs)
+    return NodeInfo(*[types.NoneType if klass is None else klass for klass in class_info],
+        **kwargs)
+
+
+class NodeMeta(type):
+    """
+    Metaclass of the classes created with :meth:`Node.get_subclass`. Allows to pickle
+    them, by calling :meth:`Node.get_subclass` again when unpickling.
+    Their subclasses are pickled by reference, like other classes.
+    """
+
+
+def _reduce_node_class(klass):
+    recipe = klass.__dict__.get('_subclass_recipe')
+    if recipe is None:
+        return klass.__name__
+    return _rebuild_subclass, recipe
+
+
+def _rebuild_subclass(cls, attrs):
+    return cls.get_subclass(**attrs)
+
+
+copy_reg.pickle(NodeMeta, _reduce_node_class)
+
+_node_metaclasses = {type: NodeMeta}
+
+
+def _node_metaclass(metaclass):
+    """
+    Returns the metaclass of the classes created with :meth:`Node.get_subclass`,
+    for a node class whose metaclass is `metaclass`. That's :class:`NodeMeta`,
+    or a subclass of both :class:`NodeMeta` and `metaclass`.
+    """
+    if issubclass(metaclass, NodeMeta):
+        return metaclass
+    try:
+        return _node_metaclasses[metaclass]
+    except KeyError:
+        node_metaclass = type('Node' + metaclass.__name__, (NodeMeta, metaclass), {})
+        copy_reg.pickle(node_metaclass, _reduce_node_class)
+        return _node_metaclasses.setdefault(metaclass, node_metaclass)
 
 
 class Node(object):
@@ -82,6 +185,23 @@ class Node(object):
     klass = NodeInfo()
     """Informs on what class the node actually contains."""
 
+    ordered_keys = False
+    """
+    If `True`, :meth:`__dump__` yields the keys in ascending order, which
+    allows loaders to stream the items instead of sorting them. The iterator
+    passed to :meth:`__load__` has the same attribute. Subclasses overriding
+    :meth:`__dump__` must set it again, or else it is ignored.
+    """
+
+    static_schema = False
+    """
+    If `True`, :meth:`__lschema__` always returns the same schema, and
+    :meth:`__dschema__` doesn't depend on the object dumped, so casts compute
+    them only once per node class. This isn't inherited by subclasses, which
+    can be modified, except by those created with :meth:`get_subclass`
+    that don't override the schemas. Other subclasses must set it again.
+    """
+
     @classmethod
     def __dump__(cls, obj):
         """
@@ -120,8 +240,25 @@ class Node(object):
         Allows inline subclassing of a node class. Example ::
 
             ListOfIntNode = IterableNode.get_subclass(klass=list, value_type=int)
+
+        Subclasses are cached in :data:`subclass_cache`, so they shouldn't be modified.
+        If one of `attrs` is not hashable, a new subclass is created each time.
         """
-        return type(cls.__name__, (cls,), attrs)
+        try:
+            key = (cls, frozenset((k, type(v), v) for k, v in attrs.iteritems()))
+            subclass = subclass_cache.get(key)
+        except TypeError:
+            return cls._new_subclass(attrs)
+        if subclass is None:
+            subclass = subclass_cache[key] = cls._new_subclass(attrs)
+        return subclass
+
+    @classmethod
+    def _new_subclass(cls, attrs):
+        subclass = _node_metaclass(type(cls))(cls.__name__, (cls,), attrs)
+        # Remembering how the class was created, so that it can be pickled.
+        subclass._subclass_recipe = (cls, attrs)
+        return subclass
 
 
 class IdentityNode(Node):
@@ -129,6 +266,8 @@ class IdentityNode(Node):
     A no-op node class defining :meth:`__dump__` and :meth:`__load__` as identity operations.
     """
 
+    static_schema = True
+
     @classmethod
     def __dump__(cls, obj):
         yield AttrDict.KeyFinal, obj
@@ -155,6 +294,8 @@ class ContainerNode(Node):
     Base class for container node classes.
     """
 
+    static_schema = True
+
     value_type = NodeInfo()
     """Type of values in the container. This is used to generate schemas."""
 
@@ -172,17 +313,52 @@ class IterableNode(ContainerNode):
     Node class for iterables.
     """
 
+    static_schema = True
+
     klass = list
 
+    ordered_keys = True
+
+    reorder_buffer_size = 1024
+    """
+    Maximum number of items kept aside when the items passed to :meth:`__load__`
+    are not ordered, waiting for the missing indexes. If more items are out
+    of order, all the remaining items are sorted.
+    """
+
+    @classmethod
+    def __dump__(cls, obj):
+        return enumerate(obj)
+
+    @classmethod
+    def __load__(cls, items_iter):
+        if getattr(items_iter, 'ordered_keys', False):
+            return cls.klass((v for k, v in items_iter))
+        return cls.klass(_sorted_values(items_iter, cls.reorder_buffer_size))
+
+
+class StreamNode(ContainerNode):
+    """
+    Node class for iterators, which can be unbounded. Its :meth:`__load__`
+    returns an iterator, casting each value only when it is consumed. e.g. ::
+
+        >>> lines = serialize(log_lines, dumper=StreamNode, loader=StreamNode)
+        >>> lines.next()
+    """
+
+    static_schema = True
+
+    ordered_keys = True
+
+    lazy = True
+
     @classmethod
     def __dump__(cls, obj):
         return enumerate(obj)
 
     @classmethod
     def __load__(cls, items_iter):
-        # TODO: needs ordered dict to pass data between nodes
-        items_iter = sorted(items_iter, key=lambda i: i[0])
-        return cls.klass((v for k, v in items_iter))
+        return (v for k, v in items_iter)
 
 
 class MappingNode(ContainerNode):
@@ -190,6 +366,8 @@ class MappingNode(ContainerNode):
     Node class for mappings.
     """
 
+    static_schema = True
+
     klass = dict
 
     @classmethod
@@ -200,3 +378,62 @@ class MappingNode(ContainerNode):
     def __load__(cls, items_iter):
         return cls.klass(items_iter)
 
+
+
+def _has_ordered_keys(dumper):
+    """
+    Returns `True` if the items dumped by `dumper` are ordered by key.
+    """
+    return _has_flag(dumper, 'ordered_keys', '__dump__')
+
+
+def _has_flag(node, flag, method):
+    """
+    Returns `True` if the attribute `flag` of `node` is true. Flags describing
+    `method` only apply to the `method` of the class setting them, or of its bases,
+    not to a `method` overriden by a subclass.
+    """
+    if not getattr(node, flag, False):
+        return False
+    if not isinstance(node, type):
+        if flag in getattr(node, '__dict__', ()):
+            return True
+        node = type(node)
+    for klass in getattr(node, '__mro__', ()):
+        if flag in klass.__dict__:
+            return True
+        if method in klass.__dict__:
+            return False
+    return True
+
+
+def _sorted_values(items_iter, buffer_size):
+    """
+    Returns the list of values of `items_iter`, sorted by key, in the same order
+    as a stable sort. Items whose keys are the next index are appended straight away.
+    The others are kept in a buffer until their index is reached, and are sorted
+    at the end if it never is.
+    """
+    values = []
+    buffered = [] # heap of (key, arrival index, value)
+    for i, (key, value) in enumerate(items_iter):
+        if key == len(values):
+            values.append(value)
+            while buffered and buffered[0][0] == len(values):
+                values.append(heapq.heappop(buffered)[2])
+            if not buffered or buffered[0][0] > len(values):
+                continue
+        elif key > len(values) and len(buffered) < buffer_size:
+            heapq.heappush(buffered, (key, i, value))
+            continue
+        else:
+            buffered.append((key, i, value))
+        # A key below the next index (a duplicate or a negative key), or too many
+        # items out of order : all the remaining items are sorted.
+        buffered.extend((k, j, v) for j, (k, v) in enumerate(items_iter, i + 1))
+        break
+    if not buffered:
+        return values
+    buffered.sort()
+    merged = heapq.merge(((k, -1, v) for k, v in enumerate(values)), buffered)
+    return [v for k, i, v in merged]
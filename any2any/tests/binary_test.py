@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import unittest
+from StringIO import StringIO
+
+from any2any import *
+from any2any.binary import (BinaryWriterNode, BinaryWriter, dump_binary, load_binary,
+BinaryMapCursor, BinaryArrayCursor)
+from any2any.tests.fixtures import Book, FirstItemNode
+
+
+def loads(data, **kwargs):
+    return load_binary(StringIO(data), **kwargs)
+
+
+class BinaryWriterNode_test(unittest.TestCase):
+
+    def setUp(self):
+        self.cast = Cast({
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+
+    def write_test(self):
+        """
+        Test writing built-in objects, and the encoding of scalars and containers
+        """
+        obj = {'a': [1, 2.5, 0.1, True, False, None, u'\xe9t\xe9', {'b': []}, -300, 2 ** 62],
+            'c': {}, 1: 'one', None: 'x' * 300, 'd': range(1000), 'e': dict.fromkeys(range(200))}
+        self.assertEqual(loads(self.cast(obj, loader=BinaryWriterNode).getvalue()), obj)
+        self.assertEqual(self.cast(5, loader=BinaryWriterNode).getvalue(), '\x85')
+        self.assertEqual(self.cast(-1, loader=BinaryWriterNode).getvalue(), '\x03\x01')
+        self.assertEqual(self.cast(200, loader=BinaryWriterNode).getvalue(), '\x03\x90\x03')
+        self.assertEqual(len(self.cast(0.5, loader=BinaryWriterNode).getvalue()), 5)
+        self.assertEqual(len(self.cast(0.1, loader=BinaryWriterNode).getvalue()), 9)
+        self.assertEqual(self.cast(u'\xe9', loader=BinaryWriterNode).getvalue(), '\x62\xc3\xa9')
+        self.assertEqual(self.cast('x' * 32, loader=BinaryWriterNode).getvalue(),
+            '\x06\x20' + 'x' * 32)
+        self.assertEqual(self.cast([[]], loader=BinaryWriterNode).getvalue(), '\x09\x01\x09\x00')
+        self.assertEqual(self.cast(iter('ab'), dumper=StreamNode,
+            loader=BinaryWriterNode).getvalue(), '\x09\x02\x41a\x41b')
+        self.assertEqual(self.cast([0] * 200, loader=BinaryWriterNode).getvalue(),
+            '\x09\xc8\x01' + '\x80' * 200)
+        self.assertRaises(TypeError, self.cast({(1, 2): 1}, loader=BinaryWriterNode).getvalue)
+
+    def write_objects_test(self):
+        """
+        Test writing objects dumped by any dumper, and values loaded by other loaders
+        """
+        books = [Book(u'Dune', 1965), Book(u'Ubik', 1969)]
+        self.assertEqual(loads(self.cast(books, loader=BinaryWriterNode).getvalue()),
+            [{'title': u'Dune', 'year': 1965}, {'title': u'Ubik', 'year': 1969}])
+        ListNode = BinaryWriterNode.get_subclass(value_type=NodeInfo(dict))
+        written = self.cast([{'a': (1, 2)}], loader=ListNode).getvalue()
+        self.assertTrue(isinstance(self.cast([1], loader=ListNode), BinaryWriter))
+        self.assertEqual(loads(written), [{'a': [1, 2]}])
+
+    def deep_nesting_test(self):
+        """
+        Test writing objects nested deeper than the recursion limit
+        """
+        obj = []
+        for i in range(5000):
+            obj = [obj]
+        written = self.cast(obj, loader=BinaryWriterNode).getvalue()
+        self.assertEqual(written, '\x09\x01' * 5000 + '\x09\x00')
+
+    def casts_test(self):
+        """
+        Test writing with the other casts
+        """
+        obj = [{'a': [1, {'b': u'c'}]}] * 10
+        for cast_class in [IterativeCast, ConcurrentCast]:
+            cast = cast_class(self.cast.node_class_map)
+            self.assertEqual(loads(cast(obj, loader=BinaryWriterNode).getvalue()), obj)
+
+
+class load_binary_test(unittest.TestCase):
+
+    def load_test(self):
+        """
+        Test reading scalars, maps and arrays
+        """
+        self.assertEqual(loads('\x09\x03\x81\x03\x03\x00'), [1, -2, None])
+        self.assertEqual(loads('\x08\x01\x81\x41a'), {1: 'a'})
+        self.assertEqual(loads('\x08\x01\x81\x07\x01a'), {1: u'a'})
+        self.assertEqual(loads('\x04\x00\x00\xc0\x3f'), 1.5)
+        self.assertEqual(loads('\x05' + '\x00' * 6 + '\xf8\x3f'), 1.5)
+        self.assertEqual(loads('\x02'), True)
+
+    def invalid_test(self):
+        """
+        Test reading invalid binary
+        """
+        for data in ['', '\x09\x01', '\x06\x05ab', '\x43ab', '\x03\xff', '\x04\x00',
+            '\x0a', '\x81\x81', '\x08\x01\x09\x00\x81']:
+            self.assertRaises(ValueError, loads, data)
+
+    def load_objects_test(self):
+        """
+        Test casting binary to objects, and skipping the items not consumed
+        """
+        FirstNode = IterableNode.get_subclass(value_type=FirstItemNode)
+        obj = [[1, [2, 3], {'a': [4]}], [5, {'b': ']'}], [6]]
+        written = IterativeCast(serialize.node_class_map)(obj, loader=BinaryWriterNode)
+        self.assertEqual(loads(written.getvalue(), loader=FirstNode), [1, 5, 6])
+
+    def cursors_test(self):
+        """
+        Test that the cursors are dumpers, and load as dicts and lists by default
+        """
+        data = serialize({'a': [1, {'b': 2}]}, loader=BinaryWriterNode).getvalue()
+        self.assertEqual(loads(data, cast=IterativeCast(deserialize.node_class_map)),
+            {'a': [1, {'b': 2}]})
+        obj = [{'a': [1, {'b': 2}]}, [3, [4]], [5]]
+        data = serialize(obj, loader=BinaryWriterNode).getvalue()
+        cast = ConcurrentCast(deserialize.node_class_map, max_workers=2)
+        self.assertEqual(loads(data, cast=cast), obj)
+        cast.close()
+        data = serialize({'a': [1, 2]}, loader=BinaryWriterNode).getvalue()
+        for loader in [BinaryWriterNode, StreamNode, MappingNode.get_subclass(
+            value_type=StreamNode)]:
+            self.assertRaises(ValueError, loads, data, loader=loader)
+        self.assertFalse(BinaryMapCursor.ordered_keys)
+        self.assertTrue(BinaryArrayCursor.ordered_keys)
+
+    def round_trip_test(self):
+        """
+        Test writing binary with dump_binary, and reading it back with load_binary
+        """
+        books = [Book(u'Dune', 1965), Book(u'Ubik', 1969)]
+        fp = StringIO()
+        dump_binary(books, fp)
+        fp.seek(0)
+        loaded = load_binary(fp, loader=IterableNode.get_subclass(value_type=Book))
+        self.assertEqual([(b.title, b.year) for b in loaded], [(u'Dune', 1965), (u'Ubik', 1969)])
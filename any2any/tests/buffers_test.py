@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import array
+import unittest
+
+from any2any import *
+
+
+class BufferNode_test(unittest.TestCase):
+
+    def passthrough_test(self):
+        """
+        Test that serialize and deserialize pass buffers and arrays as is
+        """
+        for obj in [bytearray('abc'), memoryview('abc'), array.array('d', [1.5, 2])]:
+            self.assertTrue(serialize(obj) is obj)
+            self.assertTrue(deserialize(obj) is obj)
+        self.assertEqual(serialize({'blob': bytearray('abc')}), {'blob': bytearray('abc')})
+
+    def zero_copy_test(self):
+        """
+        Test that memoryviews share the memory of the object loaded
+        """
+        data = bytearray('abc')
+        view = deserialize(data, loader=NodeInfo(memoryview))
+        self.assertTrue(isinstance(view, memoryview))
+        data[0] = 'x'
+        self.assertEqual(view.tobytes(), 'xbc')
+
+        data = array.array('i', [1, 2])
+        casted = deserialize(data, loader=NodeInfo(array.array, typecode='i'))
+        self.assertTrue(casted is data)
+
+    def convert_test(self):
+        """
+        Test converting between bytes, arrays and lists of numbers
+        """
+        ListNode = BufferNode.get_subclass(klass=list)
+        self.assertEqual(deserialize(array.array('d', [1.5, 2]), loader=ListNode), [1.5, 2])
+        self.assertEqual(deserialize(bytearray('ab'), loader=ListNode), [97, 98])
+        self.assertEqual(deserialize([1, 2], dumper=BufferNode,
+            loader=NodeInfo(array.array, typecode='i')), array.array('i', [1, 2]))
+        self.assertEqual(deserialize(array.array('B', [97, 98]),
+            loader=NodeInfo(bytearray)), bytearray('ab'))
+        self.assertEqual(deserialize(bytearray('ab'), loader=NodeInfo(array.array)),
+            array.array('B', [97, 98]))
+        self.assertEqual(deserialize(array.array('i', [1]),
+            loader=NodeInfo(memoryview)).tobytes(), array.array('i', [1]).tostring())
+
+    def load_items_test(self):
+        """
+        Test loading numbers dumped one by one
+        """
+        self.assertEqual(deserialize([3, 4], dumper=IterableNode,
+            loader=NodeInfo(array.array, typecode='i')), array.array('i', [3, 4]))
+        self.assertEqual(deserialize({1: 4, 0: 3}, dumper=MappingNode,
+            loader=BufferNode.get_subclass(klass=bytearray)), bytearray([3, 4]))
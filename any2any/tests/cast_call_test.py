@@ -107,6 +107,8 @@ class BookNode(object):
 
 class Cast_complex_calls_test(unittest.TestCase):
 
+    cast_class = Cast
+
     def setUp(self):
         books = [Book('1984'), Book('animal farm')]
         george = Author('George Orwell', books)
@@ -116,7 +118,7 @@ class Cast_complex_calls_test(unittest.TestCase):
         base_george = BaseAuthor('George Orwell', base_books)
         self.base_george = base_george
 
-        self.serializer = Cast({
+        self.serializer = self.cast_class({
             AllSubSetsOf(dict): MappingNode,
             AllSubSetsOf(list): IterableNode,
             AllSubSetsOf(object): IdentityNode,
@@ -128,7 +130,7 @@ class Cast_complex_calls_test(unittest.TestCase):
             AllSubSetsOf(BaseBook): MappingNode,
         })
 
-        self.deserializer = Cast({
+        self.deserializer = self.cast_class({
             AllSubSetsOf(dict): MappingNode,
             AllSubSetsOf(list): IterableNode,
             AllSubSetsOf(object): IdentityNode,
@@ -184,3 +186,35 @@ class Cast_complex_calls_test(unittest.TestCase):
             self.assertTrue(isinstance(book, BaseBook))
         self.assertEqual(truman.books[0].title, 'In cold blood')
 
+
+    def compile_test(self):
+        """
+        test compiled casts with objects and nodes that know how to dump and load.
+        """
+        serialize_author = self.serializer.compile(dumper=AuthorNode)
+        for i in range(2):
+            self.assertEqual(serialize_author(self.base_george), {
+                'name': 'George Orwell', 'books': [
+                    {'title': '1984'},
+                    {'title': 'animal farm'}
+                ]
+            })
+        self.assertEqual(serialize_author(self.george), serialize_author(self.base_george))
+        deserialize_author = self.deserializer.compile(loader=Author)
+        for i in range(2):
+            truman = deserialize_author({'name': 'Truman Capote', 'books': [
+                {'title': 'In cold blood'},
+            ]})
+            self.assertTrue(isinstance(truman, Author))
+            self.assertTrue(isinstance(truman.books[0], Book))
+            self.assertEqual(truman.books[0].title, 'In cold blood')
+
+
+class IterativeCast_complex_calls_test(Cast_complex_calls_test):
+
+    cast_class = IterativeCast
+
+
+class ConcurrentCast_complex_calls_test(Cast_complex_calls_test):
+
+    cast_class = ConcurrentCast
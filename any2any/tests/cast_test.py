@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
 import unittest
+import threading
+import itertools
+import cPickle
+import sys
 
 from any2any.node import *
-from any2any.exceptions import NoNodeClassError
+from any2any.exceptions import NoNodeClassError, NotIncludedError, CycleError
 from any2any.cast import *
 from any2any.utils import *
+from any2any.tracing import Tracer
 
 
 class MyNode(Node): pass
@@ -118,6 +123,459 @@ class Cast_test(unittest.TestCase):
         self.assertEqual(cast(['a', 'b', 'c'], loader=list), ['a', 'b', 'c'])
         self.assertEqual(cast(1, loader=int), 1)
 
+    def compile_test(self):
+        """
+        test calls to compiled casts
+        """
+        cast = Cast({
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+        plan = cast.compile(loader=list)
+        self.assertEqual(plan({'a': 1, 'b': 2}), [1, 2])
+        self.assertEqual(plan(['a', 'b', 'c']), ['a', 'b', 'c'])
+        self.assertEqual(plan(['d', 'e']), ['d', 'e'])
+        plan = cast.compile(loader=IterableNode.get_subclass(value_type=NodeInfo(list)))
+        self.assertEqual(plan([{'a': 1}, ['b', 'c']]), [[1], ['b', 'c']])
+        plan = cast.compile()
+        self.assertEqual(plan({'a': [1, {'b': 2}]}), {'a': [1, {'b': 2}]})
+        self.assertEqual(plan(1), 1)
+
+    def compile_map_modified_test(self):
+        """
+        test that compiled casts resolve the node classes again when the maps change
+        """
+        class UpperNode(IdentityNode):
+            @classmethod
+            def __load__(cls, items_iter):
+                return super(UpperNode, cls).__load__(items_iter).upper()
+
+        cast = Cast({
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+        plan = cast.compile(loader=IterableNode.get_subclass(value_type=NodeInfo(str)))
+        self.assertEqual(plan(['a']), ['a'])
+        cast.node_class_map[AllSubSetsOf(str)] = UpperNode
+        self.assertEqual(plan(['a']), ['A'])
+        cast.node_class_map = ClassSetDict({
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+        self.assertEqual(plan(['a']), ['a'])
+        cast.node_class_map[AllSubSetsOf(dict)] = MappingNode
+        plan = cast.compile()
+        self.assertEqual(plan({'a': 1}), {'a': 1})
+        cast.fallback_map = ClassSetDict({AllSubSetsOf(dict): IterableNode})
+        self.assertEqual(plan({'a': 1}), [1])
+
+    def iterative_call_test(self):
+        """
+        test that IterativeCast gives the same results as Cast
+        """
+        node_class_map = {
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        }
+        cast = Cast(node_class_map)
+        iterative_cast = IterativeCast(node_class_map)
+        for inpt, loader in [
+            ({'a': 1, 'b': [2, {'c': 3}]}, NodeInfo()),
+            ({'a': 1, 'b': 2}, list),
+            (['a', 'b', 'c'], dict),
+            ([[1, 2], [3]], IterableNode.get_subclass(value_type=NodeInfo(dict))),
+            (1, int),
+        ]:
+            self.assertEqual(iterative_cast(inpt, loader=loader), cast(inpt, loader=loader))
+        self.assertRaises(NotIncludedError, iterative_cast, {'a': 1},
+            loader=MappingNode.get_subclass(__lschema__=classmethod(lambda cls: {})))
+
+    def iterative_deep_test(self):
+        """
+        test IterativeCast with an object nested deeper than the recursion limit
+        """
+        cast = IterativeCast({
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+        depth = sys.getrecursionlimit() * 3
+        inpt = 'bottom'
+        for i in range(depth):
+            inpt = [inpt]
+        casted = cast(inpt)
+        for i in range(depth):
+            self.assertEqual(len(casted), 1)
+            self.assertFalse(casted is inpt)
+            casted, inpt = casted[0], inpt[0]
+        self.assertEqual(casted, 'bottom')
+
+    def call_ordered_keys_test(self):
+        """
+        test that ordered_keys is ignored for subclasses overriding __dump__
+        """
+        class ReversedNode(IterableNode):
+            @classmethod
+            def __dump__(cls, obj):
+                return reversed(list(enumerate(obj)))
+        class OrderedReversedNode(ReversedNode):
+            ordered_keys = True
+
+        node_class_map = {
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        }
+        for cast in [Cast(node_class_map), IterativeCast(node_class_map),
+            ConcurrentCast(node_class_map)]:
+            self.assertEqual(cast([1, 2, 3], dumper=ReversedNode), [1, 2, 3])
+            self.assertEqual(cast.compile(dumper=ReversedNode)([1, 2, 3]), [1, 2, 3])
+            self.assertEqual(cast([1, 2, 3], dumper=ReversedNode.get_subclass(klass=list)),
+                [1, 2, 3])
+            # Declaring the order again is trusted.
+            self.assertEqual(cast([1, 2, 3], dumper=OrderedReversedNode), [3, 2, 1])
+
+    def call_stream_test(self):
+        """
+        test casting an unbounded iterator
+        """
+        for cast_class in [Cast, IterativeCast]:
+            cast = cast_class({
+                AllSubSetsOf(list): IterableNode,
+                AllSubSetsOf(tuple): IterableNode,
+                AllSubSetsOf(object): IdentityNode,
+            })
+            dumped = []
+            def tuples():
+                for i in itertools.count():
+                    dumped.append(i)
+                    yield (i, i + 1)
+            casted = cast(tuples(), dumper=StreamNode,
+                loader=StreamNode.get_subclass(value_type=NodeInfo(list)))
+            self.assertEqual(dumped, [])
+            self.assertEqual(casted.next(), [0, 1])
+            self.assertEqual(casted.next(), [1, 2])
+            self.assertEqual(dumped, [0, 1])
+
+            ListOfStreamsNode = IterableNode.get_subclass(value_type=StreamNode)
+            casted = cast([iter('ab'), iter('cd')],
+                dumper=ListOfStreamsNode, loader=ListOfStreamsNode)
+            self.assertEqual([list(v) for v in casted], [['a', 'b'], ['c', 'd']])
+
+    def call_threads_test(self):
+        """
+        test calls to the same cast from several threads
+        """
+        cast = Cast({
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+        cast.tracer = Tracer()
+        results = []
+        def target(i):
+            for j in range(50):
+                results.append(cast({'a': [i, {'b': j}]}) == {'a': [i, {'b': j}]})
+            results.append(cast._path == [])
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(8)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual(len(results), 8 * 51)
+        self.assertTrue(all(results))
+
+    def call_scalars_test(self):
+        """
+        test casting containers of scalars, which are copied without calling the nodes
+        """
+        class UpperNode(IdentityNode):
+            @classmethod
+            def __load__(cls, items_iter):
+                return super(UpperNode, cls).__load__(items_iter).upper()
+
+        node_class_map = {
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        }
+        inpt = [1, 2L, 3.0, True, None, 'a', u'b', {'c': [4]}]
+        for cast in [Cast(node_class_map), IterativeCast(node_class_map)]:
+            self.assertEqual(cast(inpt), inpt)
+            self.assertEqual(cast.compile()(inpt), inpt)
+            self.assertEqual(cast(['a', u'b'],
+                loader=IterableNode.get_subclass(value_type=UpperNode)), ['A', u'B'])
+
+    def call_scalars_staticmethod_test(self):
+        """
+        test casting scalars with an IdentityNode defining __load__ as a staticmethod
+        """
+        class DoubleNode(IdentityNode): pass
+        DoubleNode.__load__ = staticmethod(lambda items_iter: items_iter.next()[1] * 2)
+
+        node_class_map = {
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        }
+        for cast in [Cast(node_class_map), IterativeCast(node_class_map)]:
+            loader = IterableNode.get_subclass(value_type=DoubleNode)
+            self.assertEqual(cast([1, 2], loader=loader), [2, 4])
+            self.assertEqual(cast.compile(loader=loader)([1, 2]), [2, 4])
+
+    def call_schema_cache_test(self):
+        """
+        test that schemas and schema factories are computed once
+        """
+        calls = []
+        class CountingNode(MappingNode):
+            static_schema = True
+            @classmethod
+            def __lschema__(cls):
+                calls.append(cls)
+                return {AttrDict.KeyAny: NodeInfo()}
+        DynamicNode = CountingNode.get_subclass(static_schema=False)
+        def factory():
+            calls.append(factory)
+            return CountingNode
+
+        node_class_map = {
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        }
+        inpt = [{'a': 1}, {'b': 2}, {'c': 3}]
+        for cast in [Cast(node_class_map), IterativeCast(node_class_map)]:
+            del calls[:]
+            self.assertEqual(cast(inpt, loader=IterableNode.get_subclass(
+                value_type=CountingNode)), inpt)
+            self.assertEqual(cast(inpt, loader=IterableNode.get_subclass(
+                value_type=CountingNode)), inpt)
+            self.assertEqual(calls, [CountingNode])
+            del calls[:]
+            self.assertEqual(cast(inpt, loader=IterableNode.get_subclass(
+                value_type=DynamicNode)), inpt)
+            self.assertEqual(calls, [DynamicNode] * 3)
+            del calls[:]
+            self.assertEqual(cast(inpt, loader=IterableNode.get_subclass(
+                __lschema__=classmethod(lambda cls: {AttrDict.KeyAny: factory}))), inpt)
+            self.assertEqual(calls, [factory])
+        self.assertEqual(cPickle.loads(cPickle.dumps(cast))(inpt), inpt)
+
+    def call_dynamic_lschema_test(self):
+        """
+        test that loader schemas of subclasses not declaring static_schema are not cached
+        """
+        class UpperNode(IdentityNode):
+            @classmethod
+            def __load__(cls, items_iter):
+                return super(UpperNode, cls).__load__(items_iter).upper()
+        class ListNode(IterableNode):
+            value_type = NodeInfo(str)
+        state = {'value_type': NodeInfo(str)}
+        class StateNode(MappingNode):
+            @classmethod
+            def __lschema__(cls):
+                return {AttrDict.KeyAny: state['value_type']}
+
+        node_class_map = {
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        }
+        for cast in [Cast(node_class_map), IterativeCast(node_class_map)]:
+            ListNode.value_type = NodeInfo(str)
+            self.assertEqual(cast(['a'], loader=ListNode), ['a'])
+            ListNode.value_type = UpperNode
+            self.assertEqual(cast(['a'], loader=ListNode), ['A'])
+            state['value_type'] = NodeInfo(str)
+            self.assertEqual(cast({'a': 'b'}, loader=StateNode), {'a': 'b'})
+            state['value_type'] = UpperNode
+            self.assertEqual(cast({'a': 'b'}, loader=StateNode), {'a': 'B'})
+
+    def call_object_dschema_test(self):
+        """
+        test that dumper schemas depending on the object dumped are not cached
+        """
+        class KeysNode(Node):
+            @classmethod
+            def __dump__(cls, obj):
+                return obj.iteritems()
+            @classmethod
+            def __load__(cls, items_iter):
+                return dict(items_iter)
+            @classmethod
+            def __dschema__(cls, obj):
+                return dict((k, NodeInfo()) for k in obj)
+            @classmethod
+            def __lschema__(cls):
+                return {AttrDict.KeyAny: NodeInfo()}
+        class KeysMappingNode(MappingNode):
+            @classmethod
+            def __dschema__(cls, obj):
+                return dict((k, NodeInfo()) for k in obj)
+
+        node_class_map = {
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        }
+        for cast in [Cast(node_class_map), IterativeCast(node_class_map)]:
+            for dumper in [KeysNode, KeysMappingNode]:
+                self.assertEqual(cast({'a': 1}, dumper=dumper), {'a': 1})
+                self.assertEqual(cast({'b': [1]}, dumper=dumper), {'b': [1]})
+
+    def call_dispatch_test(self):
+        """
+        test that the node classes resolved for built-in types are updated
+        when node_class_map is modified
+        """
+        class UpperNode(IdentityNode):
+            @classmethod
+            def __load__(cls, items_iter):
+                return super(UpperNode, cls).__load__(items_iter).upper()
+
+        cast = Cast({
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+        loader = IterableNode.get_subclass(value_type=NodeInfo(str))
+        self.assertEqual(cast(['a'], loader=loader), ['a'])
+        cast.node_class_map[AllSubSetsOf(str)] = UpperNode
+        self.assertEqual(cast(['a'], loader=loader), ['A'])
+        cast.node_class_map = ClassSetDict({
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+        self.assertEqual(cast(['a'], loader=loader), ['a'])
+
+    def call_memoize_test(self):
+        """
+        test casting shared objects and cycles with memoize
+        """
+        dumps = []
+        class Shared(object):
+            def __dump__(self):
+                dumps.append(self)
+                yield 'name', 'shared'
+
+        node_class_map = {
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        }
+        fallback_map = dict(node_class_map)
+        fallback_map[AllSubSetsOf(Shared)] = MappingNode
+        shared_dict = {'a': [1]}
+        shared = Shared()
+        inpt = [shared_dict, shared_dict, [shared, shared]]
+        for cast in [Cast(node_class_map, fallback_map),
+            IterativeCast(node_class_map, fallback_map)]:
+            del dumps[:]
+            casted = cast(inpt)
+            self.assertEqual(casted, [{'a': [1]}, {'a': [1]},
+                [{'name': 'shared'}, {'name': 'shared'}]])
+            self.assertFalse(casted[0] is casted[1])
+            self.assertEqual(len(dumps), 2)
+
+            cast.memoize = True
+            del dumps[:]
+            casted = cast(inpt)
+            self.assertEqual(casted, [{'a': [1]}, {'a': [1]},
+                [{'name': 'shared'}, {'name': 'shared'}]])
+            self.assertTrue(casted[0] is casted[1])
+            self.assertFalse(casted[0] is shared_dict)
+            self.assertTrue(casted[2][0] is casted[2][1])
+            self.assertEqual(len(dumps), 1)
+            # Each call has its own memo
+            self.assertFalse(cast(inpt)[0] is casted[0])
+
+            cycle = {'a': [1]}
+            cycle['a'].append(cycle)
+            self.assertRaises(CycleError, cast, cycle)
+            self.assertRaises(CycleError, cast, [cycle])
+            self.assertEqual(cast(inpt), casted)
+
+    def concurrent_call_test(self):
+        """
+        test that ConcurrentCast casts siblings concurrently, in order
+        """
+        events = dict((k, threading.Event()) for k in 'abcd')
+        waited = {}
+        class WaitingNode(IdentityNode):
+            @classmethod
+            def __load__(cls, items_iter):
+                value = super(WaitingNode, cls).__load__(items_iter)
+                # 'a' waits for 'b' and 'b' for 'a', so they must be casted concurrently
+                events[value].set()
+                waited[value] = events[{'a': 'b', 'b': 'a'}.get(value, value)].wait(5)
+                return value.upper()
+
+        node_class_map = {
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        }
+        cast = ConcurrentCast(node_class_map, max_workers=2)
+        self.assertEqual(cast(['a', 'b', 'c', 'd'],
+            loader=IterableNode.get_subclass(value_type=WaitingNode)), ['A', 'B', 'C', 'D'])
+        self.assertEqual(waited, dict((k, True) for k in 'abcd'))
+
+        inpt = [{'a': [1, 2L, 'b']}, [3.0, None, [True]]] * 10
+        self.assertEqual(cast(inpt), inpt)
+        self.assertRaises(NotIncludedError, cast, [{'a': 1}] * 10,
+            loader=IterableNode.get_subclass(value_type=MappingNode.get_subclass(
+                __lschema__=classmethod(lambda cls: {}))))
+        self.assertEqual(cPickle.loads(cPickle.dumps(cast))(inpt), inpt)
+        cast.close()
+        self.assertEqual(cast(inpt), inpt)
+        cast.close()
+
+    def map_test(self):
+        """
+        test casting several objects with Cast.map
+        """
+        cast = Cast({
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+        inpts = [{'a': 1}, {'b': [2]}, ['c'], ['d', 'e'], {'f': 3}, 4]
+        casted = cast.map(iter(inpts))
+        self.assertEqual(casted.next(), {'a': 1})
+        self.assertEqual(list(casted), inpts[1:])
+        self.assertEqual(list(cast.map(inpts[:2], loader=list)), [[1], [[2]]])
+
+    def pickle_test(self):
+        """
+        test pickling a cast
+        """
+        cast = Cast({
+            AllSubSetsOf(list): IterableNode.get_subclass(value_type=NodeInfo(float)),
+            AllSubSetsOf(object): IdentityNode,
+        }, {AllSubSetsOf(list): IterableNode})
+        cast([1])
+        unpickled = cPickle.loads(cPickle.dumps(cast, 2))
+        self.assertItemsEqual(unpickled.node_class_map.keys(), cast.node_class_map.keys())
+        self.assertEqual(unpickled.fallback_map, cast.fallback_map)
+        self.assertEqual(unpickled([1, 2]), [1, 2])
+        unpickled.tracer = Tracer()
+        self.assertEqual(unpickled._path, [])
+
+    def parallel_map_test(self):
+        """
+        test casting items in several processes
+        """
+        cast = Cast({
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+        inpts = [{'a': [i, {'b': i}]} for i in range(50)]
+        self.assertEqual(cast.parallel_map(inpts, processes=2, chunksize=7), inpts)
+        loader = IterableNode.get_subclass(value_type=NodeInfo(list))
+        self.assertEqual(cast.parallel_map([{'a': 1}, ['b']], loader=loader,
+            processes=2), [[[1]], [['b']]])
+
     def call_inpt_with_dump_test(self):
         """
         Test call with an input that has itself a __dump__ method.
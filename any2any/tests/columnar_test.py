@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from any2any import *
+from any2any.columnar import RecordArrayNode, RecordsNode, numpy
+from any2any.tests.fixtures import Book
+
+
+class RecordNode(MappingNode):
+
+    @classmethod
+    def __lschema__(cls):
+        return {
+            'id': NodeInfo(int),
+            'name': NodeInfo(unicode),
+            'score': IdentityNode.get_subclass(klass=float),
+            'tags': NodeInfo(list, value_type=NodeInfo(unicode)),
+        }
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class RecordArrayNode_test(unittest.TestCase):
+
+    def setUp(self):
+        self.records = [{'id': i, 'name': u'record %s' % i, 'score': i * 0.5,
+            'tags': [u'a', u'b']} for i in range(5)]
+        self.ArrayNode = RecordArrayNode.get_subclass(value_type=RecordNode)
+
+    def load_test(self):
+        """
+        Test loading records to a structured array, with the types of the loader schema
+        """
+        array = serialize(self.records, dumper=IdentityNode, loader=self.ArrayNode)
+        self.assertEqual(array.dtype.names, ('id', 'name', 'score', 'tags'))
+        self.assertEqual([array.dtype[name].kind for name in array.dtype.names],
+            ['i', 'U', 'f', 'O'])
+        self.assertEqual(array['score'].tolist(), [0, 0.5, 1, 1.5, 2])
+        self.assertEqual(array['tags'][4], [u'a', u'b'])
+
+        # Records casted one by one
+        self.assertEqual(serialize(self.records, loader=self.ArrayNode).tolist(),
+            array.tolist())
+        self.assertEqual(len(serialize([], dumper=IdentityNode, loader=self.ArrayNode)), 0)
+
+    def load_columns_test(self):
+        """
+        Test loading records to a dict of column arrays
+        """
+        columns = serialize(self.records, dumper=IdentityNode,
+            loader=self.ArrayNode.get_subclass(columns=True))
+        self.assertEqual(sorted(columns), ['id', 'name', 'score', 'tags'])
+        self.assertEqual(columns['id'].tolist(), range(5))
+        self.assertEqual(columns['id'].dtype, numpy.int64)
+
+    def load_fields_test(self):
+        """
+        Test the fields when the value type has no schema, or with a dtype
+        """
+        books = [Book(u'Dune', 1965), Book(u'Ubik', 1969)]
+        array = serialize(books, dumper=IdentityNode, loader=RecordArrayNode)
+        self.assertEqual(array.dtype.names, ('title', 'year'))
+        self.assertEqual(array.tolist(), [(u'Dune', 1965), (u'Ubik', 1969)])
+        array = serialize(self.records, dumper=IdentityNode,
+            loader=RecordArrayNode.get_subclass(dtype=[('score', 'f4'), ('id', 'i2')]))
+        self.assertEqual(array.dtype, numpy.dtype([('score', 'f4'), ('id', 'i2')]))
+        self.assertEqual(array['id'].tolist(), range(5))
+
+    def dump_test(self):
+        """
+        Test casting structured arrays and dicts of column arrays back to records
+        """
+        array = serialize(self.records, dumper=IdentityNode, loader=self.ArrayNode)
+        RecordsListNode = RecordsNode.get_subclass(value_type=RecordNode)
+        self.assertEqual(serialize(array, dumper=IdentityNode, loader=RecordsListNode),
+            self.records)
+        self.assertEqual(serialize(array, dumper=RecordArrayNode, loader=RecordsListNode),
+            self.records)
+        columns = {'title': numpy.array([u'Dune']), 'year': numpy.array([1965])}
+        books = serialize(columns, dumper=IdentityNode,
+            loader=RecordsNode.get_subclass(value_type=Book))
+        self.assertEqual([(b.title, b.year) for b in books], [(u'Dune', 1965)])
+        self.assertEqual(serialize([1, 2], loader=RecordsNode), [1, 2])
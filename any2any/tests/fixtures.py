@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Objects and node classes shared by several test modules.
+"""
+from any2any import IdentityNode, AttrDict, NodeInfo
+
+
+class Book(object):
+
+    def __init__(self, title, year):
+        self.title = title
+        self.year = year
+
+    def __dump__(self):
+        yield 'title', self.title
+        yield 'year', self.year
+
+    @classmethod
+    def __load__(cls, items_iter):
+        attrs = dict(items_iter)
+        return cls(attrs['title'], attrs['year'])
+
+
+class FirstItemNode(IdentityNode):
+    """
+    Loads the first value of a map or array.
+    """
+
+    @classmethod
+    def __lschema__(cls):
+        return {AttrDict.KeyAny: NodeInfo()}
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+import unittest
+import json
+from StringIO import StringIO
+
+from any2any import *
+from any2any.jsonstream import (JSONWriterNode, JSONWriter, dump_json, load_json,
+JSONObjectCursor, JSONArrayCursor)
+from any2any.tests.fixtures import Book, FirstItemNode
+
+
+class CountingFile(object):
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, string):
+        self.chunks.append(string)
+
+
+class JSONWriterNode_test(unittest.TestCase):
+
+    def setUp(self):
+        self.cast = Cast({
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+
+    def write_test(self):
+        """
+        Test writing built-in objects as JSON
+        """
+        obj = {'a': [1, 2.5, True, None, u'\xe9t\xe9', {'b': []}], 'c': {}, 1: 'one', None: 2}
+        written = self.cast(obj, loader=JSONWriterNode).getvalue()
+        self.assertEqual(json.loads(written), json.loads(json.dumps(obj)))
+        self.assertEqual(self.cast(5, loader=JSONWriterNode).getvalue(), '5')
+        self.assertEqual(self.cast([[]], loader=JSONWriterNode).getvalue(), '[[]]')
+        self.assertEqual(self.cast(iter('ab'), dumper=StreamNode,
+            loader=JSONWriterNode).getvalue(), '["a","b"]')
+        self.assertRaises(TypeError, self.cast({(1, 2): 1}, loader=JSONWriterNode).getvalue)
+
+    def write_objects_test(self):
+        """
+        Test writing objects dumped by any dumper, and values loaded by other loaders
+        """
+        books = [Book(u'Dune', 1965), Book(u'Ubik', 1969)]
+        self.assertEqual(json.loads(self.cast(books, loader=JSONWriterNode).getvalue()),
+            [{'title': 'Dune', 'year': 1965}, {'title': 'Ubik', 'year': 1969}])
+        ListNode = JSONWriterNode.get_subclass(value_type=NodeInfo(dict))
+        self.assertEqual(self.cast([{'a': [1]}], loader=ListNode).getvalue(), '[{"a":[1]}]')
+
+    def lazy_test(self):
+        """
+        Test that values are casted only when they are written, and only once
+        """
+        casted = []
+        class RecordingNode(IdentityNode):
+            @classmethod
+            def __dump__(cls, obj):
+                casted.append(obj)
+                yield AttrDict.KeyFinal, obj
+        RecordingWriterNode = JSONWriterNode.get_subclass(value_type=NodeInfo(
+            dict, list, JSONWriterNode))
+        cast = Cast({
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): RecordingNode,
+        })
+        writer = cast([[1, 2]], loader=RecordingWriterNode)
+        self.assertTrue(isinstance(writer, JSONWriter))
+        self.assertEqual(casted, [])
+        self.assertEqual(writer.getvalue(), '[[1,2]]')
+        self.assertEqual(casted, [1, 2])
+        self.assertRaises(ValueError, writer.getvalue)
+
+    def deep_nesting_test(self):
+        """
+        Test writing objects nested deeper than the recursion limit
+        """
+        obj = []
+        for i in range(5000):
+            obj = [obj]
+        self.assertEqual(self.cast(obj, loader=JSONWriterNode).getvalue(),
+            '[' * 5001 + ']' * 5001)
+
+    def casts_test(self):
+        """
+        Test writing with the other casts
+        """
+        obj = [{'a': [1, {'b': u'c'}]}] * 10
+        for cast_class in [IterativeCast, ConcurrentCast]:
+            cast = cast_class(self.cast.node_class_map)
+            self.assertEqual(json.loads(cast(obj, loader=JSONWriterNode).getvalue()), obj)
+
+    def dump_json_test(self):
+        """
+        Test dump_json writes by chunks
+        """
+        obj = {'a': range(100), 'b': [{'c': u'd'}] * 10}
+        fp = StringIO()
+        dump_json(obj, fp)
+        self.assertEqual(json.loads(fp.getvalue()), obj)
+        fp = CountingFile()
+        dump_json(obj, fp, cast=self.cast, chunk_size=100)
+        self.assertEqual(json.loads(''.join(fp.chunks)), obj)
+        self.assertTrue(len(fp.chunks) > 1)
+        self.assertTrue(all(len(chunk) < 200 for chunk in fp.chunks))
+
+
+class load_json_test(unittest.TestCase):
+
+    def load_test(self):
+        """
+        Test reading JSON by chunks of any size
+        """
+        text = json.dumps({'a': [1, -2.5e-3, True, False, None, u'\xe9t\xe9 \\"\ud83d\ude00'],
+            'b': {'c': [[], {}]}, 'd': 1234567890}, indent=1)
+        for chunk_size in [1, 2, 3, 1000]:
+            self.assertEqual(load_json(StringIO(text), chunk_size=chunk_size), json.loads(text))
+        self.assertEqual(load_json(StringIO(' "a" ')), u'a')
+        self.assertEqual(load_json(StringIO('[1e3]'), chunk_size=2), [1000.0])
+
+    def invalid_test(self):
+        """
+        Test reading invalid JSON
+        """
+        for text in ['', '[1,]', '{"a" 1}', '[1 2]', '{"a": 1}x', '"a', '[', 'nul',
+            '{"a": 1,}', '{1: 2}', '"\\x"']:
+            self.assertRaises(ValueError, load_json, StringIO(text), chunk_size=2)
+
+    def load_objects_test(self):
+        """
+        Test casting JSON to objects, and skipping the items not consumed
+        """
+        BooksNode = IterableNode.get_subclass(value_type=Book)
+        text = '[{"title": "Dune", "year": 1965}, {"year": 1969, "title": "Ubik"}]'
+        books = load_json(StringIO(text), loader=BooksNode)
+        self.assertEqual([(b.title, b.year) for b in books], [(u'Dune', 1965), (u'Ubik', 1969)])
+
+        FirstNode = IterableNode.get_subclass(value_type=FirstItemNode)
+        text = '[[1, [2, 3], {"a": [4]}], [5, {"b": "]"}], [6]]'
+        self.assertEqual(load_json(StringIO(text), chunk_size=3, loader=FirstNode),
+            [1, 5, 6])
+
+    def cursors_test(self):
+        """
+        Test that the cursors are dumpers, and load as dicts and lists by default
+        """
+        self.assertEqual(load_json(StringIO('{"a": [1, {"b": 2}]}'),
+            cast=IterativeCast(deserialize.node_class_map)), {'a': [1, {'b': 2}]})
+        cast = ConcurrentCast(deserialize.node_class_map, max_workers=2)
+        self.assertEqual(load_json(StringIO('[{"a": [1, {"b": 2}]}, [3, [4]], [5]]'),
+            cast=cast), [{'a': [1, {'b': 2}]}, [3, [4]], [5]])
+        cast.close()
+        for loader in [JSONWriterNode, StreamNode, MappingNode.get_subclass(
+            value_type=StreamNode)]:
+            self.assertRaises(ValueError, load_json, StringIO('{"a": [1, 2]}'),
+                loader=loader)
+        self.assertEqual(list(load_json(StringIO('[]'), loader=StreamNode)), [])
+        self.assertFalse(JSONObjectCursor.ordered_keys)
+        self.assertTrue(JSONArrayCursor.ordered_keys)
+
+    def round_trip_test(self):
+        """
+        Test writing JSON with dump_json, and reading it back with load_json
+        """
+        books = [Book(u'Dune', 1965), Book(u'Ubik', 1969)]
+        fp = StringIO()
+        dump_json(books, fp)
+        fp.seek(0)
+        loaded = load_json(fp, loader=IterableNode.get_subclass(value_type=Book))
+        self.assertEqual([(b.title, b.year) for b in loaded], [(u'Dune', 1965), (u'Ubik', 1969)])
+
@@ -1,12 +1,23 @@
 # -*- coding: utf-8 -*-
 from unittest import TestCase
 import copy
+import pickle
+import cPickle
+import abc
+import random
+import operator
 
 from any2any.node import *
 from any2any.cast import *
 from any2any.utils import AttrDict, ClassSet
 
 
+class AbcBase(object):
+    __metaclass__ = abc.ABCMeta
+
+class AbcMappingNode(AbcBase, MappingNode): pass
+
+
 class NodeImplement(Node):
 
     def __dump__(self):
@@ -79,6 +90,43 @@ class NodeInfo_test(TestCase):
         self.assertEqual(node_info.kwargs, node_info_copy.kwargs)
 
 
+    def get_class_test(self):
+        """
+        Test NodeInfo.get_class
+        """
+        self.assertEqual(NodeInfo(int, str).get_class(int), int)
+        self.assertEqual(NodeInfo(int, str).get_class(float), str)
+        self.assertEqual(NodeInfo().get_class(float), float)
+
+    def immutable_test(self):
+        """
+        Test that NodeInfo is immutable, hashable, and compared by value
+        """
+        node_info = NodeInfo(int, str, bla=90)
+        self.assertRaises(AttributeError, setattr, node_info, 'kwargs', {})
+        node_info.kwargs['bla'] = 91
+        self.assertEqual(node_info.kwargs, {'bla': 90})
+        self.assertTrue(copy.copy(node_info) is node_info)
+        self.assertTrue(copy.deepcopy(node_info) is node_info)
+        self.assertEqual(node_info, NodeInfo(int, str, bla=90))
+        self.assertEqual(hash(node_info), hash(NodeInfo(int, str, bla=90)))
+        self.assertNotEqual(node_info, NodeInfo(int, str, bla=91))
+        self.assertNotEqual(node_info, NodeInfo(str, int, bla=90))
+        self.assertNotEqual(NodeInfo(), NodeInfo(int))
+        self.assertRaises(TypeError, hash, NodeInfo(bla=[1]))
+        self.assertEqual(NodeInfo(bla=[1]), NodeInfo(bla=[1]))
+
+    def pickle_test(self):
+        """
+        Test pickling NodeInfo
+        """
+        for node_info in [NodeInfo(), NodeInfo(int, type(None), bla=[1])]:
+            for module in [pickle, cPickle]:
+                unpickled = module.loads(module.dumps(node_info))
+                self.assertEqual(unpickled, node_info)
+                self.assertEqual(unpickled.class_info, node_info.class_info)
+
+
 class Node_Test(TestCase):
     
     def setUp(self):
@@ -99,7 +147,55 @@ class Node_Test(TestCase):
         self.assertFalse(issubclass(Node, MyNode))
         self.assertEqual(MyNode.klass, int)
         self.assertEqual(MyNode.bla, 8)
-        
+
+    def get_subclass_cache_test(self):
+        """
+        Test that get_subclass returns the same class for the same attributes.
+        """
+        hits = subclass_cache.hits
+        MyNode = Node.get_subclass(klass=int, bla=8)
+        self.assertTrue(Node.get_subclass(klass=int, bla=8) is MyNode)
+        self.assertEqual(subclass_cache.hits, hits + 1)
+        self.assertFalse(Node.get_subclass(klass=int, bla=True) is MyNode)
+        self.assertFalse(IdentityNode.get_subclass(klass=int, bla=8) is MyNode)
+
+        # Unhashable attributes
+        MyNode = Node.get_subclass(klass=int, bla=[8])
+        self.assertFalse(Node.get_subclass(klass=int, bla=[8]) is MyNode)
+        self.assertEqual(MyNode.bla, [8])
+
+    def pickle_test(self):
+        """
+        Test pickling node classes, including classes created with get_subclass.
+        """
+        ListOfIntNode = IterableNode.get_subclass(klass=list,
+            value_type=IdentityNode.get_subclass(klass=int))
+        ListOfListNode = IterableNode.get_subclass(value_type=NodeInfo(list), bla=[1])
+        ListOfTupleNode = IterableNode.get_subclass(value_type=NodeInfo(tuple))
+        for module in [pickle, cPickle]:
+            self.assertTrue(module.loads(module.dumps(IntNode)) is IntNode)
+            self.assertTrue(module.loads(module.dumps(ListOfIntNode)) is ListOfIntNode)
+            self.assertTrue(module.loads(module.dumps(ListOfTupleNode)) is ListOfTupleNode)
+            unpickled = module.loads(module.dumps(ListOfListNode, 2))
+            self.assertTrue(issubclass(unpickled, IterableNode))
+            self.assertEqual(unpickled.value_type, ListOfListNode.value_type)
+            self.assertEqual(unpickled.bla, [1])
+
+    def metaclass_test(self):
+        """
+        Test node classes deriving from a class with a metaclass.
+        """
+        self.assertTrue(type(Node) is type)
+        self.assertTrue(type(IterableNode) is type)
+        self.assertTrue(isinstance(AbcMappingNode, abc.ABCMeta))
+        DictNode = AbcMappingNode.get_subclass(klass=dict)
+        self.assertTrue(issubclass(DictNode, AbcMappingNode))
+        self.assertTrue(isinstance(DictNode, abc.ABCMeta))
+        self.assertTrue(AbcMappingNode.get_subclass(klass=dict) is DictNode)
+        for module in [pickle, cPickle]:
+            self.assertTrue(module.loads(module.dumps(DictNode)) is DictNode)
+            self.assertTrue(module.loads(module.dumps(AbcMappingNode)) is AbcMappingNode)
+
 
 class IdentityNode_Test(TestCase):
     """
@@ -154,6 +250,45 @@ class IterableNode_Test(TestCase):
         loaded_list = IterableNode.__load__({}.iteritems())
         self.assertEqual(loaded_list, [])
 
+    def load_unordered_test(self):
+        """
+        Test IterableNode.__load__ with items that are not in order
+        """
+        items = [(2, 'c'), (0, 'a'), (1, 'b'), (4, 'e'), (-1, 'z'), (6, 'g'), (3, 'd')]
+        self.assertEqual(IterableNode.__load__(iter(items)),
+            ['z', 'a', 'b', 'c', 'd', 'e', 'g'])
+        SmallBufferNode = IterableNode.get_subclass(reorder_buffer_size=1)
+        self.assertEqual(SmallBufferNode.__load__(iter(items)),
+            ['z', 'a', 'b', 'c', 'd', 'e', 'g'])
+        self.assertEqual(IterableNode.__load__(iter([('b', 2), ('a', 1)])), [1, 2])
+        items = [(1, 'a'), (-1, 'z'), (0, 'b'), (1, 'c')]
+        self.assertEqual(IterableNode.__load__(iter(items)), ['z', 'b', 'a', 'c'])
+
+    def load_unordered_random_test(self):
+        """
+        Test that IterableNode.__load__ orders the items like a stable sort
+        """
+        rand = random.Random(0)
+        for i in range(500):
+            items = [(rand.randint(-2, 12), j) for j in range(rand.randint(0, 12))]
+            expected = [v for k, v in sorted(items, key=operator.itemgetter(0))]
+            for buffer_size in [0, 1, 3, 1024]:
+                SmallBufferNode = IterableNode.get_subclass(reorder_buffer_size=buffer_size)
+                self.assertEqual(SmallBufferNode.__load__(iter(items)), expected)
+
+    def load_ordered_test(self):
+        """
+        Test IterableNode.__load__ with items declared in order
+        """
+        class OrderedItems(object):
+            ordered_keys = True
+            def __init__(self, items):
+                self.items_iter = iter(items)
+            def __iter__(self):
+                return self.items_iter
+        loaded_list = IterableNode.__load__(OrderedItems([(0, 'a'), (5, 'b'), (7, 'c')]))
+        self.assertEqual(loaded_list, ['a', 'b', 'c'])
+
     def dschema_lschema_test(self):
 
         class ListOfInt(IterableNode):
@@ -163,6 +298,28 @@ class IterableNode_Test(TestCase):
         self.assertEqual(ListOfInt.__lschema__(), {AttrDict.KeyAny: int})
 
 
+class StreamNode_Test(TestCase):
+    """
+    Simple tests on StreamNode
+    """
+
+    def dump_test(self):
+        """
+        Test StreamNode.__dump__
+        """
+        items = StreamNode.__dump__(c for c in 'abc')
+        self.assertEqual(items.next(), (0, 'a'))
+        self.assertEqual(list(items), [(1, 'b'), (2, 'c')])
+
+    def load_test(self):
+        """
+        Test StreamNode.__load__
+        """
+        loaded = StreamNode.__load__(iter([(0, 'a'), (1, 'b')]))
+        self.assertEqual(loaded.next(), 'a')
+        self.assertEqual(list(loaded), ['b'])
+
+
 class MappingNode_Test(TestCase):
     """
     Simple tests on MappingNode
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+import unittest
+import json
+from StringIO import StringIO
+
+from any2any import *
+from any2any.tracing import LogTracer
+from any2any.exceptions import NotIncludedError
+
+
+class RecordingTracer(Tracer):
+
+    def __init__(self):
+        self.events = []
+        self.elapsed = []
+
+    def enter(self, path, inpt):
+        self.events.append(('enter', path, inpt))
+
+    def resolve(self, path, inpt, dumper, loader):
+        self.events.append(('resolve', path, inpt))
+
+    def leave(self, path, inpt, casted, elapsed):
+        self.elapsed.append(elapsed)
+        self.events.append(('leave', path, casted))
+
+
+class Tracer_test(unittest.TestCase):
+
+    def setUp(self):
+        self.cast = Cast({
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+
+    def events_test(self):
+        """
+        Test the events received by a tracer
+        """
+        tracer = RecordingTracer()
+        self.cast.tracer = tracer
+        self.assertEqual(self.cast({'a': [1]}), {'a': [1]})
+        self.assertEqual(tracer.events, [
+            ('enter', (), {'a': [1]}),
+            ('resolve', (), {'a': [1]}),
+            ('enter', ('a',), [1]),
+            ('resolve', ('a',), [1]),
+            ('enter', ('a', 0), 1),
+            ('resolve', ('a', 0), 1),
+            ('leave', ('a', 0), 1),
+            ('leave', ('a',), [1]),
+            ('leave', (), {'a': [1]}),
+        ])
+        self.assertTrue(all(elapsed >= 0 for elapsed in tracer.elapsed))
+
+    def iterative_events_test(self):
+        """
+        Test that IterativeCast sends the same events as Cast
+        """
+        inpt = {'a': [1, {'b': 2}], 'c': 3}
+        tracer = RecordingTracer()
+        self.cast.tracer = tracer
+        self.cast(inpt)
+        iterative_tracer = RecordingTracer()
+        iterative_cast = IterativeCast(self.cast.node_class_map)
+        iterative_cast.tracer = iterative_tracer
+        iterative_cast(inpt)
+        self.assertItemsEqual(tracer.events, iterative_tracer.events)
+        self.assertEqual([e for e in tracer.events if e[0] == 'enter'],
+            [e for e in iterative_tracer.events if e[0] == 'enter'])
+
+    def path_after_error_test(self):
+        """
+        Test that the path is reset when an error occurs while tracing
+        """
+        self.cast.tracer = Tracer()
+        self.assertRaises(NotIncludedError, self.cast, {'a': 1},
+            loader=MappingNode.get_subclass(__lschema__=classmethod(lambda cls: {})))
+        self.assertEqual(self.cast._path, [])
+
+    def debug_test(self):
+        """
+        Test that setting debug logs the casting
+        """
+        self.assertFalse(self.cast.debug)
+        self.cast.debug = True
+        self.assertTrue(isinstance(self.cast.tracer, LogTracer))
+        stream = StringIO()
+        self.cast.tracer.stream = stream
+        self.cast([1])
+        self.assertEqual(stream.getvalue().splitlines(), [
+            '\t %s <= [1]' % IterableNode,
+            '\t [ 0 ]',
+            '\t\t %s <= 1' % IdentityNode,
+            '\t\t %s => 1' % IdentityNode,
+            '\t %s => [1]' % IterableNode,
+        ])
+        self.cast.debug = False
+        self.assertIsNone(self.cast.tracer)
+
+    def debug_profile_test(self):
+        """
+        Test that unsetting debug or profile only detaches their own tracer
+        """
+        self.cast.debug = True
+        self.cast.profile = False
+        self.assertTrue(self.cast.debug)
+        self.cast.profile = True
+        self.cast.debug = False
+        self.assertTrue(self.cast.profile)
+        tracer = self.cast.tracer = Tracer()
+        self.cast.debug = False
+        self.cast.profile = False
+        self.assertTrue(self.cast.tracer is tracer)
+
+
+class ProfileTracer_test(unittest.TestCase):
+
+    def setUp(self):
+        self.cast = Cast({
+            AllSubSetsOf(dict): MappingNode,
+            AllSubSetsOf(list): IterableNode,
+            AllSubSetsOf(object): IdentityNode,
+        })
+
+    def stats_test(self):
+        """
+        Test the statistics collected when profiling
+        """
+        self.assertRaises(ValueError, self.cast.stats)
+        self.cast.profile = True
+        self.assertTrue(isinstance(self.cast.tracer, ProfileTracer))
+        loader = MappingNode.get_subclass(__lschema__=classmethod(lambda cls: {
+            'a': NodeInfo(list), AttrDict.KeyAny: NodeInfo()}))
+        self.cast({'a': [1, 2], 'b': 3}, loader=loader)
+        stats = self.cast.stats()
+        self.assertItemsEqual(stats['paths'], ['', 'a', 'a.*', '*'])
+        self.assertEqual(stats['paths']['a.*']['calls'], 2)
+        self.assertEqual(stats['loaders']['any2any.node.IdentityNode']['calls'], 3)
+        self.assertEqual(stats['loaders']['any2any.node.MappingNode']['calls'], 1)
+        self.assertEqual(stats['dumpers']['any2any.node.IterableNode']['calls'], 1)
+        root = stats['paths']['']
+        self.assertTrue(root['cumtime'] >= root['selftime'] >= 0)
+        self.assertTrue(root['cumtime'] >= root['resolvetime'] >= 0)
+        self.assertAlmostEqual(root['cumtime'],
+            sum(entry['selftime'] for entry in stats['paths'].values()))
+        self.assertEqual(json.loads(self.cast.stats_json()), stats)
+
+        self.cast.reset_stats()
+        self.assertEqual(self.cast.stats(), {'dumpers': {}, 'loaders': {}, 'paths': {}})
+        self.cast.profile = False
+        self.assertIsNone(self.cast.tracer)
+
+    def iterative_stats_test(self):
+        """
+        Test that IterativeCast collects the same statistics as Cast
+        """
+        inpt = {'a': [1, {'b': 2}], 'c': 3}
+        self.cast.profile = True
+        self.cast(inpt)
+        iterative_cast = IterativeCast(self.cast.node_class_map)
+        iterative_cast.profile = True
+        iterative_cast(inpt)
+        for table in ['dumpers', 'loaders', 'paths']:
+            stats = self.cast.stats()[table]
+            iterative_stats = iterative_cast.stats()[table]
+            self.assertItemsEqual(stats, iterative_stats)
+            for name in stats:
+                self.assertEqual(stats[name]['calls'], iterative_stats[name]['calls'])
+        root = iterative_cast.stats()['paths']['']
+        self.assertAlmostEqual(root['cumtime'], sum(entry['selftime']
+            for entry in iterative_cast.stats()['paths'].values()))
@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
 import unittest
+import collections
+import operator
+import cPickle
+import types
 
 from any2any.utils import *
 
@@ -67,6 +71,14 @@ class ClassSet_Test(unittest.TestCase):
         self.assertTrue(AllSubSetsOf(object) >= AllSubSetsOf(int))
         self.assertTrue(AllSubSetsOf(object) >= AllSubSetsOf(object))
 
+    def pickle_test(self):
+        """
+        Test pickling class sets
+        """
+        for class_set in [AllSubSetsOf(int), AllSubSetsOf(types.NoneType),
+            ClassSet(str, types.NoneType)]:
+            self.assertEqual(cPickle.loads(cPickle.dumps(class_set)), class_set)
+
 
 class ClassSetDict_Test(unittest.TestCase):
     """
@@ -97,6 +109,55 @@ class ClassSetDict_Test(unittest.TestCase):
         self.assertIsNone(csd.subsetget(str))
         self.assertEqual(csd.subsetget(str, 'blabla'), 'blabla')
 
+    def subsetget_invalidate_test(self):
+        """
+        test that ClassSetDict.subsetget results are updated when the dict is modified
+        """
+        csd = ClassSetDict({AllSubSetsOf(object): 1})
+        self.assertEqual(csd.subsetget(int), 1)
+        csd[ClassSet(int)] = 2
+        self.assertEqual(csd.subsetget(int), 2)
+        csd.update({ClassSet(int): 3})
+        self.assertEqual(csd.subsetget(int), 3)
+        del csd[ClassSet(int)]
+        self.assertEqual(csd.subsetget(int), 1)
+        csd.clear()
+        self.assertIsNone(csd.subsetget(int))
+
+    def version_test(self):
+        """
+        test that ClassSetDict.version changes when the dict is modified
+        """
+        csd = ClassSetDict({AllSubSetsOf(object): 1})
+        version = csd.version
+        csd.subsetget(int)
+        self.assertEqual(csd.version, version)
+        csd[ClassSet(int)] = 2
+        self.assertTrue(csd.version > version)
+
+    def subsetget_hierarchy_test(self):
+        """
+        test ClassSetDict.subsetget picks the closest class set in a class hierarchy
+        """
+        class A(object): pass
+        class B(A): pass
+        class C(B): pass
+        class D(C): pass
+        csd = ClassSetDict({
+            AllSubSetsOf(object): 1,
+            AllSubSetsOf(A): 2,
+            AllSubSetsOf(C): 3,
+            ClassSet(D, int): 4,
+            AllSubSetsOf(collections.Mapping): 5,
+        })
+        self.assertEqual(csd.subsetget(A), 2)
+        self.assertEqual(csd.subsetget(B), 2)
+        self.assertEqual(csd.subsetget(C), 3)
+        self.assertEqual(csd.subsetget(D), 4)
+        self.assertEqual(csd.subsetget(int), 4)
+        self.assertEqual(csd.subsetget(dict), 5)
+        self.assertEqual(csd.subsetget(ClassSet(B, C)), 2)
+
 
 class AttrDict_test(unittest.TestCase):
     """
@@ -252,3 +313,88 @@ class AttrDict_test(unittest.TestCase):
         attr_dict = AttrDict({AttrDict.KeyFinal: int})
         other = AttrDict({AttrDict.KeyAny: int})
         self.assertRaises(NotIncludedError, attr_dict.validate_inclusion, other)
+
+
+class FrozenAttrDict_test(unittest.TestCase):
+    """
+    Tests for the FrozenAttrDict class
+    """
+
+    def getitem_test(self):
+        """
+        Test FrozenAttrDict.__getitem__ and FrozenAttrDict.get
+        """
+        d = FrozenAttrDict({AttrDict.KeyAny: 1, 'a': 2})
+        self.assertEqual(d['a'], 2)
+        self.assertEqual(d['c'], 1)
+        self.assertEqual(d.get('c'), 1)
+        self.assertRaises(KeyError, d.__getitem__, AttrDict.KeyFinal)
+        self.assertEqual(d.get(AttrDict.KeyFinal, 3), 3)
+        d = FrozenAttrDict({'a': None})
+        self.assertEqual(d['a'], None)
+        self.assertRaises(KeyError, d.__getitem__, 'b')
+        self.assertEqual(d.get('b', 2), 2)
+        d = FrozenAttrDict({AttrDict.KeyFinal: int})
+        self.assertEqual(d[AttrDict.KeyFinal], int)
+
+    def contains_test(self):
+        """
+        Test FrozenAttrDict.__contains__ and the attributes computed on creation
+        """
+        d = FrozenAttrDict({AttrDict.KeyAny: 1, 'a': 2})
+        self.assertTrue('a' in d)
+        self.assertTrue('b' in d)
+        self.assertFalse(AttrDict.KeyFinal in d)
+        self.assertEqual((d.has_any, d.is_final, d.default), (True, False, 1))
+        d = FrozenAttrDict({AttrDict.KeyFinal: int})
+        self.assertFalse('a' in d)
+        self.assertEqual((d.has_any, d.is_final, d.default), (False, True, None))
+        self.assertRaises(ValueError, FrozenAttrDict, {AttrDict.KeyFinal: int, 'a': 1})
+
+    def frozen_test(self):
+        """
+        Test that FrozenAttrDict is immutable, hashable and comparable to other mappings
+        """
+        d = FrozenAttrDict({AttrDict.KeyAny: 1, 'a': 2})
+        self.assertRaises(AttributeError, setattr, d, 'has_any', False)
+        self.assertRaises(TypeError, operator.setitem, d, 'b', 1)
+        self.assertEqual(hash(d), hash(FrozenAttrDict({'a': 2, AttrDict.KeyAny: 1})))
+        self.assertEqual(d, FrozenAttrDict({'a': 2, AttrDict.KeyAny: 1}))
+        self.assertEqual(d, AttrDict({'a': 2, AttrDict.KeyAny: 1}))
+        self.assertNotEqual(d, {'a': 2})
+        self.assertTrue(isinstance(d, collections.Mapping))
+        self.assertEqual(cPickle.loads(cPickle.dumps(d)), d)
+        self.assertEqual(list(FrozenAttrDict({'a': 1, AttrDict.KeyAny: 2}).iter_attrs()), ['a'])
+
+
+class BoundedCache_test(unittest.TestCase):
+    """
+    Tests for the BoundedCache class
+    """
+
+    def get_test(self):
+        """
+        Test BoundedCache.get and counters
+        """
+        cache = BoundedCache()
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('a', 2), 2)
+        cache['a'] = 1
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        cache.clear()
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (0, 0, 0))
+
+    def max_size_test(self):
+        """
+        Test that the oldest entries are discarded when the cache is full
+        """
+        cache = BoundedCache(max_size=2)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache['a'] = 3
+        cache['c'] = 4
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+        self.assertEqual(cache.get('c'), 4)
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import sys
+import json
+import threading
+from timeit import default_timer
+
+from utils import AttrDict
+
+
+class Tracer(object):
+    """
+    Base for tracers. A tracer attached to a :class:`Cast` through its ``tracer``
+    attribute receives events for each value casted. When no tracer is attached,
+    the cast doesn't pay any tracing cost.
+
+    `path` is the tuple of keys leading from the casted object to the value,
+    e.g. ``('books', 0, 'title')``. This class implements all the events
+    as no-ops, so subclasses only need to override the events they need.
+    """
+
+    def enter(self, path, inpt):
+        """
+        Called when the casting of `inpt` begins.
+        """
+        pass
+
+    def resolve(self, path, inpt, dumper, loader):
+        """
+        Called once `dumper` and `loader` have been chosen for `inpt`.
+        """
+        pass
+
+    def leave(self, path, inpt, casted, elapsed):
+        """
+        Called when `inpt` has been casted to `casted`, in `elapsed` seconds.
+        """
+        pass
+
+
+class LogTracer(Tracer):
+    """
+    Tracer printing the casting operations to `stream`, indented by depth.
+    This is the tracer used by ``Cast.debug``.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self._local = threading.local()
+
+    def enter(self, path, inpt):
+        if path:
+            self.log(path[:-1], '[ %s ]' % (path[-1],))
+
+    def resolve(self, path, inpt, dumper, loader):
+        loaders = self._local.__dict__.setdefault('loaders', [])
+        del loaders[len(path):]
+        loaders.append(loader)
+        self.log(path, '%s <= %s' % (dumper, inpt))
+
+    def leave(self, path, inpt, casted, elapsed):
+        self.log(path, '%s => %s' % (self._local.loaders[len(path)], casted))
+
+    def log(self, path, msg):
+        stream = self.stream or sys.stdout
+        stream.write('%s %s\n' % ('\t' * (len(path) + 1), msg))
+
+
+class ProfileTracer(Tracer):
+    """
+    Tracer collecting statistics, to find out where the time is spent when casting.
+    This is the tracer used by ``Cast.profile``. :meth:`stats` returns a dictionary ::
+
+        {
+            'dumpers': {node class name: entry},
+            'loaders': {node class name: entry},
+            'paths': {key path: entry},
+        }
+
+    Each entry counts the values casted (``calls``), the time spent casting them
+    including (``cumtime``) or excluding (``selftime``) their nested values,
+    and the part of that time spent resolving the nodes and schemas (``resolvetime``).
+    Key paths are the keys leading to the values joined with dots, where keys
+    matched by :class:`AttrDict.KeyAny` in the loader's schema are replaced
+    with ``'*'``, e.g. ``'books.*.title'``. The casted object itself has the path ``''``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._schema_keys = {}
+        self.reset()
+
+    def reset(self):
+        """
+        Discards the statistics collected so far.
+        """
+        with self._lock:
+            self._stats = {'dumpers': {}, 'loaders': {}, 'paths': {}}
+
+    def stats(self):
+        """
+        Returns a copy of the statistics collected so far.
+        """
+        with self._lock:
+            return dict((table, dict((name, dict(entry)) for name, entry in entries.iteritems()))
+                for table, entries in self._stats.iteritems())
+
+    def to_json(self, **kwargs):
+        """
+        Returns the statistics as a JSON string. `kwargs` are passed to :func:`json.dumps`.
+        """
+        return json.dumps(self.stats(), **kwargs)
+
+    @property
+    def _frames(self):
+        try:
+            return self._local.frames
+        except AttributeError:
+            frames = self._local.frames = []
+            return frames
+
+    def enter(self, path, inpt):
+        frames = self._frames
+        del frames[len(path):]
+        if path and frames:
+            parent = frames[-1]
+            key = path[-1]
+            if not key in self._get_schema_keys(parent.loader):
+                key = '*'
+            key_path = '%s.%s' % (parent.key_path, key) if parent.key_path else '%s' % key
+        else:
+            key_path = ''
+        frames.append(_ProfileFrame(key_path, default_timer()))
+
+    def resolve(self, path, inpt, dumper, loader):
+        frame = self._frames[len(path)]
+        frame.resolvetime = default_timer() - frame.start
+        frame.dumper = dumper
+        frame.loader = loader
+
+    def leave(self, path, inpt, casted, elapsed):
+        frames = self._frames
+        frame = frames[len(path)]
+        del frames[len(path):]
+        if frames:
+            frames[-1].children_time += elapsed
+        selftime = elapsed - frame.children_time
+        with self._lock:
+            for table, name in [('dumpers', _node_name(frame.dumper)),
+                ('loaders', _node_name(frame.loader)), ('paths', frame.key_path)]:
+                entries = self._stats[table]
+                try:
+                    entry = entries[name]
+                except KeyError:
+                    entry = entries[name] = {'calls': 0, 'cumtime': 0.0,
+                        'selftime': 0.0, 'resolvetime': 0.0}
+                entry['calls'] += 1
+                entry['cumtime'] += elapsed
+                entry['selftime'] += selftime
+                entry['resolvetime'] += frame.resolvetime
+
+    def _get_schema_keys(self, loader):
+        """
+        Returns the keys explicitely declared in the schema of `loader`.
+        """
+        try:
+            return self._schema_keys[loader]
+        except KeyError:
+            lschema = loader.__lschema__() if hasattr(loader, '__lschema__') else {}
+            keys = self._schema_keys[loader] = frozenset(
+                k for k in lschema if not k is AttrDict.KeyAny)
+            return keys
+
+
+class _ProfileFrame(object):
+    """
+    A value being casted, as seen by :class:`ProfileTracer`.
+    """
+
+    __slots__ = ('key_path', 'start', 'resolvetime', 'children_time', 'dumper', 'loader')
+
+    def __init__(self, key_path, start):
+        self.key_path = key_path
+        self.start = start
+        self.resolvetime = 0.0
+        self.children_time = 0.0
+        self.dumper = None
+        self.loader = None
+
+
+def _node_name(node):
+    klass = node if isinstance(node, type) else type(node)
+    return '%s.%s' % (klass.__module__, klass.__name__)
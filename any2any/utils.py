@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 import collections
+import threading
+import types
 
 from exceptions import NotIncludedError
 
@@ -58,6 +60,9 @@ class ClassSet(BaseClassSet):
     def __repr__(self):
         return u"{%s}" % ', '.join([c.__name__ for c in self._classes])
 
+    def __reduce__(self):
+        return _rebuild_class_set, (self.__class__, map(_pickle_class, self._classes))
+
     def __hash__(self):
         return hash(('%s' % self.__class__.__name__, tuple(self._classes)))
 
@@ -87,49 +92,250 @@ class AllSubSetsOf(BaseClassSet):
     def __repr__(self):
         return u"Any '%s'" % self._klass.__name__
 
+    def __reduce__(self):
+        return _rebuild_class_set, (self.__class__, [_pickle_class(self._klass)])
+
     def __hash__(self):
         return hash(('%s' % self.__class__.__name__, self._klass))
 
 
+def _pickle_class(klass):
+    # `NoneType` cannot be pickled by reference, so we replace it with `None`.
+    return None if klass is types.NoneType else klass
+
+
+def _rebuild_class_set(cls, classes):
+    return cls(*[types.NoneType if klass is None else klass for klass in classes])
+
+
 class ClassSetDict(dict):
     """
     Dictionary whose keys are instances of :class:`BaseClassSet`.
-    Allows to easily lookup the best match for a given class by using :meth:`subsetget`. 
+    Allows to easily lookup the best match for a given class by using :meth:`subsetget`.
+
+    The results of :meth:`subsetget` are memoized by class, and the memo is
+    invalidated whenever the dictionary is modified. Lookups can be done
+    from several threads at once.
     """
 
+    _no_match = object()
+
+    version = 0
+    """Incremented each time the dictionary is modified."""
+
+    def __init__(self, *args, **kwargs):
+        super(ClassSetDict, self).__init__(*args, **kwargs)
+        self._invalidate()
+
     def subsetget(self, klass, default=None):
         """
         Similar to :meth:`dict.get`, but looks-up by the smallest class set including
         `klass`.
         """
-        class_sets = set(filter(lambda cs: klass <= cs, self))
-        # Eliminate supersets
-        for cs1 in class_sets.copy():
-            for cs2 in class_sets.copy():
-                if cs1 <= cs2 and not cs1 is cs2:
-                    class_sets.discard(cs2)
+        # The cache and the index are replaced at once when the dict is modified,
+        # so we keep a reference to make sure that a result is not stored in
+        # a newer cache, nor looked-up in an older index.
+        memo = self._memo
+        cache = memo.cache
         try:
-            best_match = list(class_sets)[0]
-        except IndexError:
+            value = cache[klass]
+        except KeyError:
+            value = cache[klass] = self._lookup(klass, memo)
+        except TypeError: # `klass` is not hashable
+            value = self._lookup(klass, memo)
+        if value is self._no_match:
             return default
+        return value
+
+    def _lookup(self, klass, memo):
+        if isinstance(klass, type):
+            index = memo.index
+            if index is None:
+                index = memo.index = _ClassSetIndex(self)
+            class_sets = index.including(klass)
+        else:
+            class_sets = filter(lambda cs: klass <= cs, self)
+        best_match = _smallest(class_sets)
+        if best_match is None:
+            return self._no_match
         return self[best_match]
 
+    def _invalidate(self):
+        self._memo = _LookupMemo()
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super(ClassSetDict, self).__setitem__(key, value)
+        self._invalidate()
+
+    def __delitem__(self, key):
+        super(ClassSetDict, self).__delitem__(key)
+        self._invalidate()
+
+    def update(self, *args, **kwargs):
+        super(ClassSetDict, self).update(*args, **kwargs)
+        self._invalidate()
+
+    def setdefault(self, key, default=None):
+        value = super(ClassSetDict, self).setdefault(key, default)
+        self._invalidate()
+        return value
+
+    def pop(self, *args):
+        value = super(ClassSetDict, self).pop(*args)
+        self._invalidate()
+        return value
+
+    def popitem(self):
+        item = super(ClassSetDict, self).popitem()
+        self._invalidate()
+        return item
+
+    def clear(self):
+        super(ClassSetDict, self).clear()
+        self._invalidate()
+
+    def __reduce__(self):
+        # The caches are not pickled
+        return self.__class__, (dict(self),)
+
     def __repr__(self):
         return 'ClassSetDict(%s)' % super(ClassSetDict, self).__repr__()
 
 
-class AttrDict(collections.MutableMapping):
+class _LookupMemo(object):
     """
-    Dictionary used internally to handle schemas.
+    Results of :meth:`ClassSetDict.subsetget` by class, and index
+    of the class sets, for one version of a :class:`ClassSetDict`.
+    """
+
+    __slots__ = ('cache', 'index')
+
+    def __init__(self):
+        self.cache = {}
+        self.index = None
+
+
+def _smallest(class_sets):
+    """
+    Returns one of the smallest class sets of `class_sets`, i.e. one that
+    doesn't include any other. Returns `None` if `class_sets` is empty.
+    """
+    class_sets = list(class_sets)
+    for cs1 in class_sets:
+        if not any(cs2 <= cs1 and not cs2 is cs1 for cs2 in class_sets):
+            return cs1
+    return None
+
+
+class _ClassSetIndex(object):
     """
+    Index of the keys of a :class:`ClassSetDict`, used to find the class sets
+    including a class without testing all the keys.
+
+    :class:`AllSubSetsOf` keys are indexed by class, and found by walking the MRO.
+    :class:`ClassSet` keys are indexed by each of their classes. Any other key,
+    or :class:`AllSubSetsOf` whose class has a custom metaclass (e.g. abstract
+    base classes, for which `issubclass` doesn't follow the MRO), is tested.
+    """
+
+    def __init__(self, class_sets):
+        self.all_subsets = {}
+        self.class_sets = {}
+        self.others = []
+        for cs in class_sets:
+            if isinstance(cs, AllSubSetsOf) and type(cs._klass) is type:
+                self.all_subsets[cs._klass] = cs
+            elif isinstance(cs, ClassSet):
+                for klass in cs._classes:
+                    self.class_sets.setdefault(klass, []).append(cs)
+            else:
+                self.others.append(cs)
+
+    def including(self, klass):
+        """
+        Returns the list of all the indexed class sets including `klass`.
+        :class:`ClassSet` come first, then :class:`AllSubSetsOf` in MRO order.
+        """
+        class_sets = list(self.class_sets.get(klass, []))
+        all_subsets = self.all_subsets
+        class_sets.extend(all_subsets[k] for k in klass.__mro__ if k in all_subsets)
+        class_sets.extend(cs for cs in self.others if klass <= cs)
+        return class_sets
+
+
+class BoundedCache(object):
+    """
+    Cache with a maximum number of entries. When the cache is full,
+    the oldest entries are discarded first. Counts the hits and misses
+    of :meth:`get` (the counts are approximate if several threads use
+    the cache), e.g. ::
+
+        >>> cache = BoundedCache(max_size=2)
+        >>> cache.get('a') is None
+        True
+        >>> cache['a'] = 1
+        >>> cache.get('a')
+        1
+        >>> cache.hits, cache.misses
+        (1, 1)
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self.clear()
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for `key`, or `default`.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if not key in self._data:
+                while len(self._data) >= self.max_size:
+                    del self._data[self._keys.popleft()]
+                self._keys.append(key)
+            self._data[key] = value
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        """
+        Empties the cache, and resets the counters.
+        """
+        with self._lock:
+            self._data = {}
+            self._keys = collections.deque()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '%s(hits=%s, misses=%s, size=%s, max_size=%s)' % (self.__class__.__name__,
+            self.hits, self.misses, len(self), self.max_size)
+
+
+class BaseAttrDict(object):
+    """
+    Base for the dictionaries used to handle schemas. In a schema, the value
+    of :class:`KeyAny` applies to any key not in the schema, and :class:`KeyFinal`
+    means that the object is dumped as a single value, which is not casted.
+    """
+
+    __slots__ = ()
 
     class KeyAny(object): pass
     class KeyFinal(object): pass
 
-    def __init__(self, *args, **kwargs):
-        self.dict = dict(*args, **kwargs)
-        self._validate()
-
     def iter_attrs(self):
         """
         Returns an iterator over attribute names in the dictionary.
@@ -137,6 +343,52 @@ class AttrDict(collections.MutableMapping):
         """
         return (a for a in self if a not in [self.KeyAny, self.KeyFinal])
 
+    def _validate(self):
+        if (self.KeyFinal in self) and len(self) != 1:
+            raise ValueError("schema cannot contain several items if it contains %s" 
+                % self.KeyFinal)
+
+    def validate_inclusion(self, other):
+        """
+        Validates that the calling attribute dict's keys are included in `other`'s keys.
+        If the validation failed :class:`NotIncludedError` is raised.
+
+        For example :
+
+            >>> ad1 = AttrDict({'a': 1, 'b': 2})
+            >>> ad2 = AttrDict({'a': 3})
+     
+        `ad2` is included in `ad1`, but `ad1` is not included in `ad2`.
+        """
+        if self.KeyAny in self:
+            if not self.KeyAny in other:
+                raise NotIncludedError("%s contains %s, but %s doesn't" % (self, self.KeyAny, other))
+        elif self.KeyFinal in self or self.KeyFinal in other:
+            if not (self.KeyFinal in self and self.KeyFinal in other):
+                raise NotIncludedError("both %s and %s must contain %s" % (self, other, self.KeyFinal))
+        elif self.KeyAny in other:
+            pass
+        elif set(other) >= set(self):
+            pass
+        else:
+            raise NotIncludedError("%s doesn't contain '%s'" %
+            (other, list(set(self) - set(other))) )
+
+
+# Module-level names for the special keys, so that they can be pickled.
+KeyAny = BaseAttrDict.KeyAny
+KeyFinal = BaseAttrDict.KeyFinal
+
+
+class AttrDict(BaseAttrDict, collections.MutableMapping):
+    """
+    Dictionary used internally to handle schemas.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.dict = dict(*args, **kwargs)
+        self._validate()
+
     def __getitem__(self, key):
         try:
             return self.dict[key]
@@ -169,33 +421,60 @@ class AttrDict(collections.MutableMapping):
     def __repr__(self):
         return '%s(%s)' % (self.__class__.__name__, self.dict)
 
-    def _validate(self):
-        if (self.KeyFinal in self.dict) and len(self.dict) != 1:
-            raise ValueError("schema cannot contain several items if it contains %s" 
-                % self.KeyFinal)
 
-    def validate_inclusion(self, other):
-        """
-        Validates that the calling attribute dict's keys are included in `other`'s keys.
-        If the validation failed :class:`NotIncludedError` is raised.
+class FrozenAttrDict(BaseAttrDict, dict):
+    """
+    Immutable and hashable version of :class:`AttrDict`, used by the casts
+    for the schemas. Whether the schema contains :class:`KeyAny` or :class:`KeyFinal`
+    (attributes ``has_any`` and ``is_final``), and the value of :class:`KeyAny`
+    (attribute ``default``) are computed once when it is created, so that
+    looking up a key is a single dictionary lookup.
+    """
+
+    __slots__ = ('has_any', 'is_final', 'default', '_hash')
+
+    def __init__(self, *args, **kwargs):
+        super(FrozenAttrDict, self).__init__(*args, **kwargs)
+        self.has_any = dict.__contains__(self, KeyAny)
+        self.is_final = dict.__contains__(self, KeyFinal)
+        self.default = dict.get(self, KeyAny)
+        self._validate()
+        self._hash = None
+
+    def __missing__(self, key):
+        if self.has_any and not key is KeyFinal:
+            return self.default
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return (dict.__contains__(self, key) or
+            (self.has_any and not key is KeyFinal))
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(frozenset(self.iteritems()))
+        return self._hash
+
+    def __setattr__(self, name, value):
+        if name != '_hash' and hasattr(self, '_hash'):
+            raise AttributeError("%s is immutable" % self.__class__.__name__)
+        super(FrozenAttrDict, self).__setattr__(name, value)
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("%s is immutable" % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = update = setdefault = pop = popitem = clear = _immutable
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, dict.__repr__(self))
 
-        For example :
 
-            >>> ad1 = AttrDict({'a': 1, 'b': 2})
-            >>> ad2 = AttrDict({'a': 3})
-     
-        `ad2` is included in `ad1`, but `ad1` is not included in `ad2`.
-        """
-        if self.KeyAny in self:
-            if not self.KeyAny in other:
-                raise NotIncludedError("%s contains %s, but %s doesn't" % (self, self.KeyAny, other))
-        elif self.KeyFinal in self or self.KeyFinal in other:
-            if not (self.KeyFinal in self and self.KeyFinal in other):
-                raise NotIncludedError("both %s and %s must contain %s" % (self, other, self.KeyFinal))
-        elif self.KeyAny in other:
-            pass
-        elif set(other) >= set(self):
-            pass
-        else:
-            raise NotIncludedError("%s doesn't contain '%s'" %
-            (other, list(set(self) - set(other))) )
@@ -0,0 +1,10 @@
+"""
+Benchmarks for any2any. Each module can be run as a script from the
+root of the repository, e.g. ::
+
+    python -m benchmarks.classsetdict
+
+The whole suite of casting scenarios (see :mod:`benchmarks.suite`) is run with ::
+
+    python -m benchmarks
+"""
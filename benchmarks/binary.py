@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Size and speed of :mod:`any2any.binary` compared to JSON, written with
+:func:`json.dumps` after :data:`any2any.serialize` or with
+:func:`any2any.jsonstream.dump_json`, and read back with :func:`json.loads`
+before :data:`any2any.deserialize` or with :func:`any2any.jsonstream.load_json`.
+"""
+import json
+import timeit
+from StringIO import StringIO
+
+from any2any import deserialize, IterableNode, NodeInfo
+from any2any.jsonstream import dump_json, load_json
+from any2any.binary import dump_binary, load_binary
+
+import fixtures
+
+AuthorsNode = IterableNode.get_subclass(value_type=fixtures.Author)
+
+
+def dumps(function):
+    def dump(obj):
+        fp = StringIO()
+        function(obj, fp, cast=fixtures.serialize_objects)
+        return fp.getvalue()
+    return dump
+
+
+def loads(function):
+    return lambda data, loader: function(StringIO(data), loader=loader)
+
+
+def json_dumps(obj):
+    return json.dumps(fixtures.serialize_objects(obj), separators=(',', ':'))
+
+
+def json_loads(data, loader):
+    return deserialize(json.loads(data), loader=loader)
+
+
+FORMATS = [
+    ('json', json_dumps, json_loads),
+    ('jsonstream', dumps(dump_json), loads(load_json)),
+    ('binary', dumps(dump_binary), loads(load_binary)),
+]
+
+SHAPES = [
+    ('authors', fixtures.authors(2000), AuthorsNode),
+    ('records', fixtures.records(5000), NodeInfo()),
+    ('scalars', fixtures.scalars(20000), NodeInfo()),
+    ('wide dict', fixtures.wide_dict(20000), NodeInfo()),
+]
+
+
+def main(number=3):
+    print '%10s %12s %10s %8s %12s %12s' % ('', '', 'bytes', 'size', 'dump ms', 'load ms')
+    for shape, obj, loader in SHAPES:
+        reference = None
+        for name, dump, load in FORMATS:
+            data = dump(obj)
+            reference = reference or len(data)
+            dump_duration = min(timeit.repeat(lambda: dump(obj),
+                number=number, repeat=3)) / number
+            load_duration = min(timeit.repeat(lambda: load(data, loader),
+                number=number, repeat=3)) / number
+            print '%10s %12s %10s %7.0f%% %12.1f %12.1f' % (shape, name, len(data),
+                100. * len(data) / reference, dump_duration * 1e3, load_duration * 1e3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Casting buffers and arrays of numbers item by item with :class:`IterableNode`,
+compared to :class:`any2any.BufferNode`.
+"""
+import array
+import timeit
+
+from any2any import deserialize, IterableNode, BufferNode, NodeInfo
+
+SIZE = 100000
+
+CASES = [
+    ('array -> list', array.array('d', range(SIZE)),
+        IterableNode, NodeInfo(list), BufferNode.get_subclass(klass=list)),
+    ('list -> array', range(SIZE),
+        IterableNode, BufferNode.get_subclass(klass=array.array, typecode='i'), None),
+    ('bytearray -> array', bytearray(SIZE),
+        IterableNode, NodeInfo(array.array, typecode='B'), None),
+    ('bytearray -> memoryview', bytearray(SIZE),
+        IterableNode, NodeInfo(memoryview), None),
+]
+
+
+def main(number=3):
+    print '%24s %16s %16s %10s' % ('', 'item by item', 'BufferNode', 'speed-up')
+    for name, inpt, item_dumper, loader, buffer_loader in CASES:
+        durations = []
+        for dumper, loader in [(item_dumper, loader),
+            (BufferNode, buffer_loader or loader)]:
+            durations.append(min(timeit.repeat(
+                lambda: deserialize(inpt, dumper=dumper, loader=loader),
+                number=number, repeat=3)) / number)
+        print '%24s %13.2f ms %13.3f ms %10.0f' % (name, durations[0] * 1e3,
+            durations[1] * 1e3, durations[0] / durations[1])
+
+
+if __name__ == '__main__':
+    main()
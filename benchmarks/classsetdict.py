@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Scaling of :meth:`ClassSetDict.subsetget` cache misses with the number of keys.
+
+A hierarchy of classes is generated, 10 levels deep, and each class is
+registered both as an :class:`AllSubSetsOf` and in a :class:`ClassSet`.
+We then time the uncached lookup of the leaf classes, with the class set index,
+and with a scan of all the keys (how lookups used to be done). The index is built
+once on the first miss following a modification of the dictionary ; its build
+time is reported separately.
+"""
+import timeit
+
+from any2any.utils import ClassSetDict, AllSubSetsOf, ClassSet, _smallest
+
+DEPTH = 10
+SIZES = [10, 100, 1000, 10000]
+
+
+def build(size):
+    """
+    Returns a :class:`ClassSetDict` with `size` keys, and the list of leaf classes.
+    """
+    csd = ClassSetDict()
+    leaves = []
+    while len(csd) < size:
+        klass = object
+        for depth in range(DEPTH):
+            klass = type('K%s' % len(csd), (klass,), {})
+            if len(csd) % 2:
+                csd[AllSubSetsOf(klass)] = klass
+            else:
+                csd[ClassSet(klass, type('C%s' % len(csd), (object,), {}))] = klass
+            if len(csd) >= size:
+                break
+        leaves.append(klass)
+    return csd, leaves
+
+
+def scan(csd, klass):
+    return _smallest(filter(lambda cs: klass <= cs, csd))
+
+
+def main(number=3):
+    print '%8s %16s %16s %16s' % ('keys', 'index build (us)',
+        'indexed (us)', 'scan (us)')
+    for size in SIZES:
+        csd, leaves = build(size)
+        leaves = leaves[:100]
+        build_index = min(timeit.repeat(
+            lambda: csd._invalidate() or csd._lookup(object, csd._memo),
+            number=number, repeat=3))
+        indexed = min(timeit.repeat(
+            lambda: [csd._lookup(k, csd._memo) for k in leaves],
+            number=number, repeat=3))
+        scanned = min(timeit.repeat(
+            lambda: [scan(csd, k) for k in leaves],
+            number=1, repeat=1))
+        print '%8s %16.2f %16.2f %16.2f' % (size,
+            build_index * 1e6 / number,
+            indexed * 1e6 / (number * len(leaves)),
+            scanned * 1e6 / len(leaves))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Loading a list of records to a NumPy structured array, by casting the records
+one by one with :class:`IterableNode` and :class:`MappingNode` before building the
+array, compared to :class:`any2any.columnar.RecordArrayNode`. And the inverse.
+"""
+import timeit
+
+import numpy
+
+from any2any import serialize, IdentityNode, IterableNode
+from any2any.columnar import RecordArrayNode, RecordsNode
+
+import fixtures
+
+RecordsListNode = IterableNode.get_subclass(value_type=fixtures.RecordNode)
+RecordsArrayNode = RecordArrayNode.get_subclass(value_type=fixtures.RecordNode)
+ColumnsNode = RecordsArrayNode.get_subclass(columns=True)
+RecordsColumnarNode = RecordsNode.get_subclass(value_type=fixtures.RecordNode)
+DTYPE = [('id', 'i8'), ('location', 'O'), ('name', 'U16'), ('score', 'f8'), ('tags', 'O')]
+
+
+def cast_then_build(records):
+    records = serialize(records, loader=RecordsListNode)
+    array = numpy.empty(len(records), dtype=DTYPE)
+    for i, record in enumerate(records):
+        array[i] = tuple(record[name] for name, dtype in DTYPE)
+    return array
+
+
+def main(count=10000, number=3):
+    records = fixtures.records(count)
+    array = serialize(records, dumper=IdentityNode, loader=RecordsArrayNode)
+    candidates = [
+        ('records -> array', records, [
+            ('cast, then build', cast_then_build),
+            ('RecordArrayNode', lambda obj: serialize(obj, loader=RecordsArrayNode)),
+            ('RecordArrayNode final', lambda obj: serialize(obj, dumper=IdentityNode,
+                loader=RecordsArrayNode)),
+            ('columns final', lambda obj: serialize(obj, dumper=IdentityNode,
+                loader=ColumnsNode)),
+        ]),
+        ('array -> records', array, [
+            ('RecordArrayNode dumper', lambda obj: serialize(obj, dumper=RecordArrayNode,
+                loader=RecordsListNode)),
+            ('RecordsNode final', lambda obj: serialize(obj, dumper=IdentityNode,
+                loader=RecordsColumnarNode)),
+        ]),
+    ]
+    print '%18s %24s %12s %10s' % ('', '', 'ms / cast', 'speed-up')
+    for direction, payload, functions in candidates:
+        reference = None
+        for name, function in functions:
+            duration = min(timeit.repeat(lambda: function(payload),
+                number=number, repeat=3)) / number
+            reference = reference or duration
+            print '%18s %24s %12.2f %10.1f' % (direction, name, duration * 1e3,
+                reference / duration)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Casting records whose loader waits on I/O, with :class:`any2any.Cast`
+and with :class:`any2any.ConcurrentCast` for a few pool sizes.
+"""
+import time
+import timeit
+
+from any2any import (Cast, ConcurrentCast, AllSubSetsOf, MappingNode,
+IterableNode, IdentityNode)
+
+LATENCY = 0.002
+
+NODE_CLASS_MAP = {
+    AllSubSetsOf(dict): MappingNode,
+    AllSubSetsOf(list): IterableNode,
+    AllSubSetsOf(object): IdentityNode,
+}
+
+
+class FetchingNode(MappingNode):
+    """
+    Loads a record after a delay, like a node fetching related data.
+    """
+
+    @classmethod
+    def __load__(cls, items_iter):
+        time.sleep(LATENCY)
+        return super(FetchingNode, cls).__load__(items_iter)
+
+
+RecordsNode = IterableNode.get_subclass(value_type=FetchingNode)
+
+PAYLOAD = [{'id': i, 'name': u'item %s' % i} for i in range(50)]
+
+
+def main(number=2):
+    casts = [('Cast', Cast(NODE_CLASS_MAP))]
+    casts.extend(('ConcurrentCast(%s)' % n, ConcurrentCast(NODE_CLASS_MAP, max_workers=n))
+        for n in [2, 4, 16])
+    reference = None
+    print '%22s %12s %10s' % ('', 'ms / cast', 'speed-up')
+    for name, cast in casts:
+        duration = min(timeit.repeat(lambda: cast(PAYLOAD, loader=RecordsNode),
+            number=number, repeat=3)) / number
+        reference = reference or duration
+        print '%22s %12.2f %10.2f' % (name, duration * 1e3, reference / duration)
+        if isinstance(cast, ConcurrentCast):
+            cast.close()
+
+
+if __name__ == '__main__':
+    main()
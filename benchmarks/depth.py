@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Time per nesting level of :class:`Cast` and :class:`IterativeCast`,
+on lists nested in lists.
+
+:class:`Cast` uses several interpreter frames per level, so it is only
+measured on depths well below the recursion limit, and depths it can't
+cast are reported as such.
+"""
+import sys
+import timeit
+
+from any2any import (Cast, IterativeCast, AllSubSetsOf, IterableNode,
+    IdentityNode)
+
+NODE_CLASS_MAP = {
+    AllSubSetsOf(list): IterableNode,
+    AllSubSetsOf(object): IdentityNode,
+}
+
+
+def nested(depth):
+    inpt = 0
+    for i in range(depth):
+        inpt = [inpt]
+    return inpt
+
+
+def main():
+    limit = sys.getrecursionlimit()
+    print '%16s %8s %16s' % ('', 'depth', 'us / level')
+    for cast_class, depths in [(Cast, [10, limit // 40, limit // 20]),
+        (IterativeCast, [10, 50, 100, 10000, 100000])]:
+        cast = cast_class(NODE_CLASS_MAP)
+        for depth in depths:
+            inpt = nested(depth)
+            number = max(1, 1000 // depth)
+            try:
+                duration = min(timeit.repeat(lambda: cast(inpt),
+                    number=number, repeat=3)) / number
+            except RuntimeError: # maximum recursion depth exceeded
+                print '%16s %8s %16s' % (cast_class.__name__, depth, 'too deep')
+                continue
+            print '%16s %8s %16.2f' % (cast_class.__name__, depth,
+                duration * 1e6 / depth)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Speed-up of the exact-type dispatch table of the casts on JSON-like payloads,
+compared to resolving every node class from :attr:`Cast.node_class_map`.
+"""
+import timeit
+
+from any2any import serialize, deserialize, cast
+
+import fixtures
+
+PAYLOADS = [
+    ('records', fixtures.records(300)),
+    ('nested', [fixtures.nested(20) for i in range(20)]),
+    ('mixed', [{'id': i, 'ok': True, 'score': None, 'tags': [u'x', 1.5, [u'y']]}
+        for i in range(300)]),
+]
+
+
+def main(number=5):
+    dispatch_types = cast.DISPATCH_TYPES
+    print '%12s %12s %14s %12s %10s' % ('', 'cast', 'no dispatch', 'dispatch', 'speed-up')
+    for name, payload in PAYLOADS:
+        for cast_name, function in [('serialize', serialize), ('deserialize', deserialize)]:
+            durations = []
+            for types in [frozenset(), dispatch_types]:
+                cast.DISPATCH_TYPES = types
+                try:
+                    durations.append(min(timeit.repeat(lambda: function(payload),
+                        number=number, repeat=5)) / number)
+                finally:
+                    cast.DISPATCH_TYPES = dispatch_types
+            print '%12s %12s %11.2f ms %9.2f ms %10.2f' % (name, cast_name,
+                durations[0] * 1e3, durations[1] * 1e3, durations[0] / durations[1])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Objects used by the benchmarks, similar to those of ``any2any/tests/cast_call_test.py``.
+"""
+from any2any import (Cast, AllSubSetsOf, IdentityNode, IterableNode,
+    MappingNode, NodeInfo, AttrDict)
+
+
+class Book(object):
+    """
+    A book object that knows how to dump and load itself
+    """
+
+    def __init__(self, title, year):
+        self.title = title
+        self.year = year
+
+    def __dump__(self):
+        yield 'title', self.title
+        yield 'year', self.year
+
+    @classmethod
+    def __load__(cls, items_iter):
+        attrs = dict(items_iter)
+        return cls(attrs['title'], attrs['year'])
+
+
+class Author(object):
+    """
+    An author object that knows how to dump and load itself
+    """
+
+    def __init__(self, name, books):
+        self.name = name
+        self.books = books
+
+    def __dump__(self):
+        yield 'name', self.name
+        yield 'books', self.books
+
+    @classmethod
+    def __load__(cls, items_iter):
+        attrs = dict(items_iter)
+        return cls(attrs['name'], attrs['books'])
+
+    @classmethod
+    def __lschema__(cls):
+        return {
+            'books': IterableNode.get_subclass(value_type=Book),
+            AttrDict.KeyAny: NodeInfo()
+        }
+
+
+# Serializer for the objects above, loading them to dicts
+serialize_objects = Cast({
+    AllSubSetsOf(dict): MappingNode,
+    AllSubSetsOf(list): IterableNode,
+    AllSubSetsOf(object): IdentityNode,
+}, {
+    AllSubSetsOf(dict): MappingNode,
+    AllSubSetsOf(list): IterableNode,
+    AllSubSetsOf(object): IdentityNode,
+    AllSubSetsOf(Author): MappingNode,
+    AllSubSetsOf(Book): MappingNode,
+})
+
+
+class RecordNode(MappingNode):
+    """
+    A mapping node with a schema described with :class:`NodeInfo`.
+    """
+
+    @classmethod
+    def __lschema__(cls):
+        return {
+            'id': NodeInfo(int),
+            'name': NodeInfo(unicode),
+            'score': NodeInfo(float),
+            'tags': NodeInfo(list, value_type=NodeInfo(unicode)),
+            'location': NodeInfo(dict, value_type=NodeInfo(float)),
+        }
+
+
+def authors(count, books=5):
+    return [Author(u'author %s' % i, [Book(u'book %s' % j, 1900 + j)
+        for j in range(books)]) for i in range(count)]
+
+
+def records(count):
+    return [{'id': i, 'name': u'record %s' % i, 'score': i * 0.5,
+        'tags': [u'a', u'b', u'c'], 'location': {'lat': 1.5, 'lng': 2.5}}
+        for i in range(count)]
+
+
+def scalars(count):
+    return [(i, i * 0.5, u'item %s' % i, i % 2 == 0)[i % 4] for i in range(count)]
+
+
+def wide_dict(count):
+    return dict((u'key %s' % i, i if i % 2 else u'value %s' % i) for i in range(count))
+
+
+def nested(depth):
+    obj = {'value': 0}
+    for i in range(depth):
+        obj = {'value': i, 'child': obj}
+    return obj
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Exporting objects to a JSON file, by loading them to dicts and lists with
+:data:`any2any.serialize` before calling :func:`json.dump`, compared to writing
+them directly with :func:`any2any.jsonstream.dump_json`.
+
+And importing them back, by calling :func:`json.load` before casting with
+:data:`any2any.deserialize`, compared to :func:`any2any.jsonstream.load_json`.
+
+Each export or import runs in a new process, whose peak memory is reported
+on top of the memory used by the payload, or by the process for imports.
+Imports include the memory of the objects loaded.
+"""
+import os
+import json
+import tempfile
+import resource
+import multiprocessing
+from timeit import default_timer
+
+from any2any import deserialize, IterableNode
+from any2any.jsonstream import dump_json, load_json
+
+import fixtures
+
+AuthorsNode = IterableNode.get_subclass(value_type=fixtures.Author)
+
+
+def serialize_then_dump(obj, fp):
+    json.dump(fixtures.serialize_objects(obj), fp, separators=(',', ':'))
+
+
+def stream_out(obj, fp):
+    dump_json(obj, fp, cast=fixtures.serialize_objects)
+
+
+def load_then_deserialize(fp):
+    return deserialize(json.load(fp), loader=AuthorsNode)
+
+
+def stream_in(fp):
+    return load_json(fp, loader=AuthorsNode)
+
+
+def measure_export(function, count, queue):
+    payload = fixtures.authors(count)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = default_timer()
+    with open(os.devnull, 'w') as fp:
+        function(payload, fp)
+    duration = default_timer() - start
+    queue.put((duration, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before))
+
+
+def measure_import(function, path, queue):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = default_timer()
+    with open(path) as fp:
+        function(fp)
+    duration = default_timer() - start
+    queue.put((duration, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before))
+
+
+def run(target, args):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=target, args=args + (queue,))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main(counts=(2000, 20000)):
+    print '%10s %24s %12s %14s' % ('authors', '', 'ms', 'peak memory')
+    for count in counts:
+        for name, function in [('serialize + json.dump', serialize_then_dump),
+            ('dump_json', stream_out)]:
+            duration, memory = run(measure_export, (function, count))
+            print '%10s %24s %12.1f %11s kB' % (count, name, duration * 1e3, memory)
+
+        fd, path = tempfile.mkstemp(suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                stream_out(fixtures.authors(count), fp)
+            for name, function in [('json.load + deserialize', load_then_deserialize),
+                ('load_json', stream_in)]:
+                duration, memory = run(measure_import, (function, path))
+                print '%10s %24s %12.1f %11s kB' % (count, name, duration * 1e3, memory)
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
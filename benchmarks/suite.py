@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the cast engine, run with ::
+
+    python -m benchmarks [scenario ...]
+
+For each scenario, casting with :data:`any2any.serialize` or :data:`any2any.deserialize`
+is compared to ``copy.deepcopy`` and, when the data is JSON-compatible,
+to a ``json`` round-trip. For each of them are reported :
+
+    - ``ops/s`` : number of casts of the whole payload per second
+    - ``us/item`` : latency per item of the payload (scalar, record, object, ...)
+    - ``gc objs/op`` : number of container objects left to the garbage collector
+      or kept alive by one cast, counted with the collector disabled.
+      Objects freed by reference counting are not counted.
+"""
+import sys
+import gc
+import copy
+import json
+import timeit
+
+from any2any import serialize, deserialize, IterativeCast, IterableNode
+
+import fixtures
+
+
+class Scenario(object):
+    """
+    A payload, and the functions to benchmark on it.
+    """
+
+    def __init__(self, name, payload, items, candidates):
+        self.name = name
+        self.payload = payload
+        self.items = items
+        self.candidates = candidates
+
+    def run(self, min_duration=0.2):
+        """
+        Returns a list ``(candidate name, ops/s, us/item, gc objs/op)``.
+        """
+        results = []
+        for name, function in self.candidates:
+            payload = self.payload
+            function(payload) # warm-up, e.g. for caches
+            number = 1
+            while timeit.timeit(lambda: function(payload), number=number) < min_duration:
+                number *= 2
+            duration = min(timeit.repeat(lambda: function(payload),
+                number=number, repeat=3)) / number
+            results.append((name, 1 / duration, duration * 1e6 / self.items,
+                gc_objects(function, payload)))
+        return results
+
+
+def gc_objects(function, payload):
+    """
+    Returns the number of container objects left to the garbage collector
+    or kept alive after calling ``function(payload)``.
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        before = gc.get_count()[0]
+        result = function(payload)
+        return gc.get_count()[0] - before
+    finally:
+        gc.enable()
+
+
+def json_round_trip(obj):
+    return json.loads(json.dumps(obj))
+
+
+AuthorsNode = IterableNode.get_subclass(value_type=fixtures.Author)
+RecordsNode = IterableNode.get_subclass(value_type=fixtures.RecordNode)
+serialize_iterative = IterativeCast(serialize.node_class_map, serialize.fallback_map)
+serialize_memoize = copy.copy(fixtures.serialize_objects)
+serialize_memoize.memoize = True
+
+
+def get_scenarios():
+    authors = fixtures.authors(200)
+    serialized_authors = fixtures.serialize_objects(authors)
+    return [
+        Scenario('flat scalars', fixtures.scalars(10000), 10000, [
+            ('serialize', serialize),
+            ('serialize compiled', serialize.compile()),
+            ('copy.deepcopy', copy.deepcopy),
+            ('json', json_round_trip),
+        ]),
+        Scenario('wide dict', fixtures.wide_dict(5000), 5000, [
+            ('serialize', serialize),
+            ('serialize compiled', serialize.compile()),
+            ('copy.deepcopy', copy.deepcopy),
+            ('json', json_round_trip),
+        ]),
+        Scenario('deep nesting', fixtures.nested(50), 50, [
+            ('serialize', serialize),
+            ('serialize compiled', serialize.compile()),
+            ('serialize iterative', serialize_iterative),
+            ('copy.deepcopy', copy.deepcopy),
+            ('json', json_round_trip),
+        ]),
+        Scenario('dump objects', authors, 200, [
+            ('serialize', fixtures.serialize_objects),
+            ('serialize compiled', fixtures.serialize_objects.compile()),
+            ('copy.deepcopy', copy.deepcopy),
+        ]),
+        Scenario('shared references', fixtures.authors(1) * 1000, 1000, [
+            ('serialize', fixtures.serialize_objects),
+            ('serialize memoize', serialize_memoize),
+            ('copy.deepcopy', copy.deepcopy),
+        ]),
+        Scenario('load objects', serialized_authors, 200, [
+            ('deserialize', lambda obj: deserialize(obj, loader=AuthorsNode)),
+            ('deserialize compiled', deserialize.compile(loader=AuthorsNode)),
+            ('copy.deepcopy', copy.deepcopy),
+            ('json', json_round_trip),
+        ]),
+        Scenario('NodeInfo schemas', fixtures.records(1000), 1000, [
+            ('deserialize', lambda obj: deserialize(obj, loader=RecordsNode)),
+            ('deserialize compiled', deserialize.compile(loader=RecordsNode)),
+            ('copy.deepcopy', copy.deepcopy),
+            ('json', json_round_trip),
+        ]),
+    ]
+
+
+def main(argv=None):
+    names = (sys.argv[1:] if argv is None else argv)
+    for scenario in get_scenarios():
+        if names and not scenario.name in names:
+            continue
+        print '%s (%s items)' % (scenario.name, scenario.items)
+        print '    %-20s %12s %12s %12s' % ('', 'ops/s', 'us/item', 'gc objs/op')
+        for name, ops, latency, objects in scenario.run():
+            print '    %-20s %12.1f %12.2f %12s' % (name, ops, latency, objects)
+        print
+
+
+if __name__ == '__main__':
+    main()
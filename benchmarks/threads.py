@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput of :data:`any2any.serialize` shared by the threads of a thread pool.
+
+Casting is CPU-bound Python code, so with the GIL the throughput can't grow
+with the number of threads ; what this measures is that sharing the cast
+doesn't make it drop, i.e. that threads are not serialized on locks.
+"""
+import timeit
+from multiprocessing.pool import ThreadPool
+
+from any2any import serialize
+
+PAYLOADS = [[{'id': i, 'name': u'item %s' % i, 'tags': [u'a', u'b']}
+    for i in range(20)] for j in range(400)]
+
+
+def main():
+    print '%8s %12s %10s' % ('threads', 'casts / s', 'relative')
+    reference = None
+    for threads in [1, 2, 4, 8, 16]:
+        pool = ThreadPool(threads)
+        try:
+            duration = min(timeit.repeat(lambda: pool.map(serialize, PAYLOADS, 1),
+                number=1, repeat=3))
+        finally:
+            pool.terminate()
+        throughput = len(PAYLOADS) / duration
+        reference = reference or throughput
+        print '%8s %12.1f %10.2f' % (threads, throughput, throughput / reference)
+
+
+if __name__ == '__main__':
+    main()
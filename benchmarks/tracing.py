@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Overhead of tracing on :data:`any2any.serialize`.
+
+Compares casting with no tracer attached, with a tracer whose events are
+no-ops, with a tracer formatting the same messages as the debug log
+(which is what every cast used to pay, debug or not), and with profiling.
+"""
+import timeit
+
+from any2any import serialize, Tracer, ProfileTracer
+
+PAYLOAD = [{'id': i, 'name': u'item %s' % i, 'tags': [u'a', u'b'],
+    'children': [{'id': j} for j in range(3)]} for i in range(300)]
+
+
+class FormattingTracer(Tracer):
+
+    def resolve(self, path, inpt, dumper, loader):
+        '%s <= %s' % (dumper, inpt)
+
+    def leave(self, path, inpt, casted, elapsed):
+        '%s => %s' % (inpt, casted)
+
+
+def main(number=5):
+    results = []
+    for name, tracer in [('no tracer', None), ('no-op tracer', Tracer()),
+        ('formatting tracer', FormattingTracer()), ('profiling', ProfileTracer())]:
+        serialize.tracer = tracer
+        try:
+            results.append((name, min(timeit.repeat(lambda: serialize(PAYLOAD),
+                number=number, repeat=3)) / number))
+        finally:
+            serialize.tracer = None
+    reference = results[0][1]
+    print '%20s %12s %10s' % ('', 'ms / cast', 'relative')
+    for name, duration in results:
+        print '%20s %12.2f %10.2f' % (name, duration * 1e3, duration / reference)
+
+
+if __name__ == '__main__':
+    main()